@@ -18,7 +18,7 @@ import json
 import random
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Callable, Dict, List, Optional, Tuple, Any
 
 
 # --------------------- dataclass ---------------------
@@ -177,44 +177,62 @@ class ComplexityConfig:
 
     def sample_post_treatment_effects(self, primary: Optional[str] = None) -> List[str]:
         """Return textual markers of treatment effects as a list of phrases."""
-        out: List[str] = []
+        return self.make_post_treatment_sampler(primary)()
+
+    def make_post_treatment_sampler(self, primary: Optional[str] = None) -> Callable[[], List[str]]:
+        """
+        Pre-resolve the level weights and choice lists for one primary site and return a
+        no-arg sampler equivalent to sample_post_treatment_effects(primary).
+        """
         if not self.level.get("enable_post_treatment", False):
-            return out
+            return list
 
         pte = self.data.get("post_treatment_effects", {})
-        # radiation (lung + abdomen pelvis generic)
-        rad = pte.get("radiation", {})
-        for site, spec in rad.items():
-            w = spec.get("weight_by_level", {}).get(self.level_name, 0.0)
-            if random.random() < w:
-                # pick acute or chronic randomly
-                bucket = random.choice([k for k in spec.keys() if k in ("acute", "chronic")])
-                txt = random.choice(spec[bucket])
-                out.append(f"Radiation change: {txt}")
+        # radiation (lung + abdomen pelvis generic): (weight, acute/chronic buckets, spec)
+        rad = [
+            (spec.get("weight_by_level", {}).get(self.level_name, 0.0),
+             [k for k in spec.keys() if k in ("acute", "chronic")],
+             spec)
+            for spec in pte.get("radiation", {}).values()
+        ]
 
         # surgery
         surg = pte.get("surgery", {})
-        w = surg.get("weight_by_level", {}).get(self.level_name, 0.0)
-        if random.random() < w:
-            # choose organ (prefer primary if available)
-            organ_list = [o for o in surg.keys() if o not in ("weight_by_level",)]
-            if primary in organ_list and random.random() < 0.7:
-                organ = primary
-            else:
-                organ = random.choice(organ_list)
-            txt = random.choice(surg[organ])
-            out.append(f"Postsurgical change: {txt}")
+        surg_w = surg.get("weight_by_level", {}).get(self.level_name, 0.0)
+        surg_organs = [o for o in surg.keys() if o not in ("weight_by_level",)]
+        prefer_primary = primary in surg_organs
 
         # ablation/embolization
         abl = pte.get("ablation_embolization", {})
-        w = abl.get("weight_by_level", {}).get(self.level_name, 0.0)
-        if random.random() < w:
-            organ_list = [o for o in abl.keys() if o not in ("weight_by_level",)]
-            organ = random.choice(organ_list)
-            txt = random.choice(abl[organ])
-            out.append(f"Post-ablation/embolization change: {txt}")
+        abl_w = abl.get("weight_by_level", {}).get(self.level_name, 0.0)
+        abl_organs = [o for o in abl.keys() if o not in ("weight_by_level",)]
+
+        def sample() -> List[str]:
+            out: List[str] = []
+            for w, buckets, spec in rad:
+                if random.random() < w:
+                    # pick acute or chronic randomly
+                    bucket = random.choice(buckets)
+                    txt = random.choice(spec[bucket])
+                    out.append(f"Radiation change: {txt}")
+
+            if random.random() < surg_w:
+                # choose organ (prefer primary if available)
+                if prefer_primary and random.random() < 0.7:
+                    organ = primary
+                else:
+                    organ = random.choice(surg_organs)
+                txt = random.choice(surg[organ])
+                out.append(f"Postsurgical change: {txt}")
+
+            if random.random() < abl_w:
+                organ = random.choice(abl_organs)
+                txt = random.choice(abl[organ])
+                out.append(f"Post-ablation/embolization change: {txt}")
 
-        return out
+            return out
+
+        return sample
 
     # --------------- impression helpers ----------------
 
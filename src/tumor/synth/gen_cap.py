@@ -26,7 +26,7 @@ import json
 import os
 import pathlib
 import random
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 # -------------------------- Config & Lexicons --------------------------
 HEDGES = ["possible", "probable", "definite"]
@@ -84,16 +84,25 @@ NEG_TEMPLATES = {
 }
 
 
-def rbool(p: float) -> bool:
-    return random.random() < p
+TECHNIQUE_CHOICES = (
+    "CT chest, abdomen, and pelvis performed with IV contrast. Contiguous ≤5-mm axial images.",
+    "Contrast-enhanced CT CAP with portal venous phase abdomen/pelvis; chest imaged in a single post-contrast phase.",
+)
+HEADER_PREFIX = "EXAM: CT CAP\nTECHNIQUE: "
+HEADER_SUFFIX = "\nHISTORY: Staging evaluation of known solid malignancy.\n\n"  # blank line before the first section
 
 
-def pick(seq):
-    return random.choice(seq)
+# rng: any object with random()/choice(); defaults to the module RNG seeded in main()
+def rbool(p: float, rng=random) -> bool:
+    return rng.random() < p
 
 
-def as_unit(val_mm: int, unit_mm_prob: float) -> str:
-    if rbool(unit_mm_prob):
+def pick(seq, rng=random):
+    return rng.choice(seq)
+
+
+def as_unit(val_mm: int, unit_mm_prob: float, rng=random) -> str:
+    if rbool(unit_mm_prob, rng):
         return f"{val_mm} mm"
     return f"{round(val_mm / 10.0, 1)} cm"
 
@@ -308,12 +317,12 @@ def recist_call(
 
 
 # -------------------------- Text assembly --------------------------
-def organ_heading(key: str) -> str:
-    return pick(ORGAN_HEADINGS[key]) + ":"
+def organ_heading(key: str, rng=random) -> str:
+    return pick(ORGAN_HEADINGS[key], rng) + ":"
 
 
-def sentence_primary(p: Dict, unit_mm_prob: float) -> str:
-    sz = as_unit(p["size_mm"], unit_mm_prob)
+def sentence_primary(p: Dict, unit_mm_prob: float, rng=random) -> str:
+    sz = as_unit(p["size_mm"], unit_mm_prob, rng)
     site = p["site"]
     if site == "lung":
         return f"{sz} {p['margin']} mass in the {p['location']} ({p['enhancement']})."
@@ -334,14 +343,14 @@ def sentence_primary(p: Dict, unit_mm_prob: float) -> str:
     return f"{sz} mass at {p['location']}."
 
 
-def sentence_ln(ln: Dict, unit_mm_prob: float) -> str:
-    sa = as_unit(ln["short_axis_mm"], unit_mm_prob)
+def sentence_ln(ln: Dict, unit_mm_prob: float, rng=random) -> str:
+    sa = as_unit(ln["short_axis_mm"], unit_mm_prob, rng)
     nec = " with central necrosis" if ln.get("necrosis") else ""
     return f"Enlarged {ln['station']} lymph node, short axis {sa}{nec}."
 
 
-def sentence_met(m: Dict, unit_mm_prob: float) -> str:
-    sz = as_unit(m["size_mm"], unit_mm_prob)
+def sentence_met(m: Dict, unit_mm_prob: float, rng=random) -> str:
+    sz = as_unit(m["size_mm"], unit_mm_prob, rng)
     return f"{sz} lesion in the {m['site']}, suspicious for metastasis."
 
 
@@ -353,116 +362,117 @@ def assemble_findings(
     include_negatives: bool,
     comparison: str,
     nonmeasurable_flags: Dict[str, bool],
+    rng=random,
 ) -> str:
     sections = []
 
     # Lungs
     lungs_lines = []
     if primary["site"] == "lung":
-        lungs_lines.append(sentence_primary(primary, unit_mm_prob))
+        lungs_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     if include_negatives or not lungs_lines:
-        lungs_lines.append(pick(NEG_TEMPLATES["lungs"]))
-    sections.append(organ_heading("lungs") + " " + " ".join(lungs_lines))
+        lungs_lines.append(pick(NEG_TEMPLATES["lungs"], rng))
+    sections.append(organ_heading("lungs", rng) + " " + " ".join(lungs_lines))
 
     # Mediastinum (thoracic nodes)
     med_lines = []
     for ln in [x for x in lns if x["region"] == "thoracic"]:
-        med_lines.append(sentence_ln(ln, unit_mm_prob))
+        med_lines.append(sentence_ln(ln, unit_mm_prob, rng))
     if include_negatives or not med_lines:
-        med_lines.append(pick(NEG_TEMPLATES["mediastinum"]))
-    sections.append(organ_heading("mediastinum") + " " + " ".join(med_lines))
+        med_lines.append(pick(NEG_TEMPLATES["mediastinum"], rng))
+    sections.append(organ_heading("mediastinum", rng) + " " + " ".join(med_lines))
 
     # Pleura / Aorta
-    sections.append(organ_heading("pleura") + " " + pick(NEG_TEMPLATES["pleura"]))
-    sections.append(organ_heading("aorta") + " " + pick(NEG_TEMPLATES["aorta"]))
+    sections.append(organ_heading("pleura", rng) + " " + pick(NEG_TEMPLATES["pleura"], rng))
+    sections.append(organ_heading("aorta", rng) + " " + pick(NEG_TEMPLATES["aorta"], rng))
 
     # Liver (primary & mets)
     liver_lines = []
     if primary["site"] == "liver":
-        liver_lines.append(sentence_primary(primary, unit_mm_prob))
+        liver_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     for m in [x for x in mets if x["site"] == "liver"]:
-        liver_lines.append(sentence_met(m, unit_mm_prob))
+        liver_lines.append(sentence_met(m, unit_mm_prob, rng))
     if include_negatives or not liver_lines:
-        liver_lines.append(pick(NEG_TEMPLATES["liver"]))
-    sections.append(organ_heading("liver") + " " + " ".join(liver_lines))
+        liver_lines.append(pick(NEG_TEMPLATES["liver"], rng))
+    sections.append(organ_heading("liver", rng) + " " + " ".join(liver_lines))
 
     # Spleen
-    sections.append(organ_heading("spleen") + " " + pick(NEG_TEMPLATES["spleen"]))
+    sections.append(organ_heading("spleen", rng) + " " + pick(NEG_TEMPLATES["spleen"], rng))
 
     # Pancreas
     pancreas_lines = []
     if primary["site"] == "pancreas":
-        pancreas_lines.append(sentence_primary(primary, unit_mm_prob))
+        pancreas_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     if include_negatives or not pancreas_lines:
-        pancreas_lines.append(pick(NEG_TEMPLATES["pancreas"]))
-    sections.append(organ_heading("pancreas") + " " + " ".join(pancreas_lines))
+        pancreas_lines.append(pick(NEG_TEMPLATES["pancreas"], rng))
+    sections.append(organ_heading("pancreas", rng) + " " + " ".join(pancreas_lines))
 
     # Adrenals
     adrenal_lines = []
     for m in [x for x in mets if x["site"] == "adrenal"]:
-        adrenal_lines.append(sentence_met(m, unit_mm_prob))
+        adrenal_lines.append(sentence_met(m, unit_mm_prob, rng))
     if include_negatives or not adrenal_lines:
-        adrenal_lines.append(pick(NEG_TEMPLATES["adrenals"]))
-    sections.append(organ_heading("adrenals") + " " + " ".join(adrenal_lines))
+        adrenal_lines.append(pick(NEG_TEMPLATES["adrenals"], rng))
+    sections.append(organ_heading("adrenals", rng) + " " + " ".join(adrenal_lines))
 
     # Kidneys
     kidney_lines = []
     if primary["site"] == "kidney":
-        kidney_lines.append(sentence_primary(primary, unit_mm_prob))
+        kidney_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     if include_negatives or not kidney_lines:
-        kidney_lines.append(pick(NEG_TEMPLATES["kidneys"]))
-    sections.append(organ_heading("kidneys") + " " + " ".join(kidney_lines))
+        kidney_lines.append(pick(NEG_TEMPLATES["kidneys"], rng))
+    sections.append(organ_heading("kidneys", rng) + " " + " ".join(kidney_lines))
 
     # GI
     gi_lines = []
     if primary["site"] in ["colon", "stomach"]:
-        gi_lines.append(sentence_primary(primary, unit_mm_prob))
+        gi_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     if include_negatives or not gi_lines:
-        gi_lines.append(pick(NEG_TEMPLATES["gi"]))
-    sections.append(organ_heading("gi") + " " + " ".join(gi_lines))
+        gi_lines.append(pick(NEG_TEMPLATES["gi"], rng))
+    sections.append(organ_heading("gi", rng) + " " + " ".join(gi_lines))
 
     # Mesentery / Peritoneum
     mes_lines = []
     for m in [x for x in mets if x["site"] == "peritoneum"]:
-        mes_lines.append(sentence_met(m, unit_mm_prob))
+        mes_lines.append(sentence_met(m, unit_mm_prob, rng))
     if nonmeasurable_flags.get("peritoneal_carcinomatosis", False):
         mes_lines.append("Diffuse peritoneal thickening with nodularity and ascites, poorly defined—nonmeasurable by RECIST.")
     if include_negatives or not mes_lines:
-        mes_lines.append(pick(NEG_TEMPLATES["mesentery"]))
-    sections.append(organ_heading("mesentery") + " " + " ".join(mes_lines))
+        mes_lines.append(pick(NEG_TEMPLATES["mesentery"], rng))
+    sections.append(organ_heading("mesentery", rng) + " " + " ".join(mes_lines))
 
     # Mesenteric vessels
-    sections.append(organ_heading("mes_vessels") + " " + pick(NEG_TEMPLATES["mes_vessels"]))
+    sections.append(organ_heading("mes_vessels", rng) + " " + pick(NEG_TEMPLATES["mes_vessels"], rng))
 
     # Bladder
-    sections.append(organ_heading("bladder") + " " + pick(NEG_TEMPLATES["bladder"]))
+    sections.append(organ_heading("bladder", rng) + " " + pick(NEG_TEMPLATES["bladder"], rng))
 
     # Reproductive
     repro_lines = []
     if primary["site"] in ["ovary", "prostate"]:
-        repro_lines.append(sentence_primary(primary, unit_mm_prob))
+        repro_lines.append(sentence_primary(primary, unit_mm_prob, rng))
     if include_negatives or not repro_lines:
-        repro_lines.append(pick(NEG_TEMPLATES["reproductive"]))
-    sections.append(organ_heading("reproductive") + " " + " ".join(repro_lines))
+        repro_lines.append(pick(NEG_TEMPLATES["reproductive"], rng))
+    sections.append(organ_heading("reproductive", rng) + " " + " ".join(repro_lines))
 
     # Abd/pelvic nodes
     ln_lines = []
     for ln in [x for x in lns if x["region"] in ("abdominal", "pelvic")]:
-        ln_lines.append(sentence_ln(ln, unit_mm_prob))
+        ln_lines.append(sentence_ln(ln, unit_mm_prob, rng))
     if include_negatives or not ln_lines:
-        ln_lines.append(pick(NEG_TEMPLATES["lymph"]))
-    sections.append(organ_heading("lymph") + " " + " ".join(ln_lines))
+        ln_lines.append(pick(NEG_TEMPLATES["lymph"], rng))
+    sections.append(organ_heading("lymph", rng) + " " + " ".join(ln_lines))
 
     # Bones
     bone_lines = []
     for m in [x for x in mets if x["site"] == "bone"]:
-        if rbool(0.5):
+        if rbool(0.5, rng):
             bone_lines.append("Sclerotic osseous metastasis—nonmeasurable by RECIST (blastic).")
         else:
-            bone_lines.append(sentence_met(m, unit_mm_prob))
+            bone_lines.append(sentence_met(m, unit_mm_prob, rng))
     if include_negatives or not bone_lines:
-        bone_lines.append(pick(NEG_TEMPLATES["bones"]))
-    sections.append(organ_heading("bones") + " " + " ".join(bone_lines))
+        bone_lines.append(pick(NEG_TEMPLATES["bones"], rng))
+    sections.append(organ_heading("bones", rng) + " " + " ".join(bone_lines))
 
     # Comparison
     if comparison:
@@ -536,8 +546,35 @@ def assemble_impression(
     return "\n".join(f"- {x}" for x in lines)
 
 
+# -------------------------- Report layouts --------------------------
+# One assembler per --style, chosen once per run instead of branching per case.
+# header is written as-is before the first section (newline-terminated, or "" for none).
+ReportAssembler = Callable[[str, str, str], str]
+
+
+def report_impression_first(header: str, findings_body: str, impression_body: str) -> str:
+    return "".join((header, "IMPRESSION:\n", impression_body, "\n\nFINDINGS:\n", findings_body, "\n"))
+
+
+def report_structured(header: str, findings_body: str, impression_body: str) -> str:
+    return "".join((header, "FINDINGS:\n", findings_body, "\n\nIMPRESSION:\n", impression_body, "\n"))
+
+
+def report_narrative(header: str, findings_body: str, impression_body: str) -> str:
+    return "".join(
+        (header, "FINDINGS: ", findings_body.replace("\n", " "), "\n\nIMPRESSION:\n", impression_body, "\n")
+    )
+
+
+REPORT_ASSEMBLERS: Dict[str, ReportAssembler] = {
+    "impression_first": report_impression_first,
+    "structured": report_structured,
+    "narrative": report_narrative,
+}
+
+
 # -------------------------- Case synthesis --------------------------
-def synth_case(args) -> Tuple[str, Dict]:
+def synth_case(args, assemble_report: Optional[ReportAssembler] = None) -> Tuple[str, Dict]:
     primary_site = random.choice(args.primary_mix)
     primary = gen_primary(primary_site)
 
@@ -613,17 +650,12 @@ def synth_case(args) -> Tuple[str, Dict]:
     )
 
     # Technique
-    technique = random.choice(
-        [
-            "CT chest, abdomen, and pelvis performed with IV contrast. Contiguous ≤5-mm axial images.",
-            "Contrast-enhanced CT CAP with portal venous phase abdomen/pelvis; chest imaged in a single post-contrast phase.",
-        ]
-    )
+    technique = TECHNIQUE_CHOICES[random.random() < 0.5]
 
-    header = f"EXAM: CT CAP\nTECHNIQUE: {technique}\nHISTORY: Staging evaluation of known solid malignancy.\n"
+    header = "".join((HEADER_PREFIX, technique, HEADER_SUFFIX))
 
     # Findings
-    findings = "FINDINGS:\n" + assemble_findings(
+    findings_body = assemble_findings(
         primary, lns, mets, args.unit_mix, args.include_negatives, comparison, nonmeasurable_flags
     )
 
@@ -631,15 +663,12 @@ def synth_case(args) -> Tuple[str, Dict]:
     recist_text = assemble_recist_block(base_targets, follow_targets or [], has_new_unequivocal)
 
     # Impression
-    impression = "IMPRESSION:\n" + assemble_impression(primary, lns, mets, hedge, recist_text, recist_category)
+    impression_body = assemble_impression(primary, lns, mets, hedge, recist_text, recist_category)
 
     # Style
-    if args.style == "impression_first":
-        text = header + "\n" + impression + "\n\n" + findings + "\n"
-    elif args.style == "structured":
-        text = header + "\n" + findings + "\n\n" + impression + "\n"
-    else:
-        text = header + "\n" + findings.replace("\n", " ") + "\n\n" + impression + "\n"
+    if assemble_report is None:
+        assemble_report = REPORT_ASSEMBLERS.get(args.style, report_narrative)
+    text = assemble_report(header, findings_body, impression_body)
 
     # Ground truth
     gt = {
@@ -686,10 +715,10 @@ def main():
     (out / "reports").mkdir(parents=True, exist_ok=True)
     labels_fp = out / "labels.jsonl"
 
-    labels_fp = out / "labels.jsonl"
+    assemble_report = REPORT_ASSEMBLERS[args.style]
     with open(labels_fp, "w", encoding="utf-8") as lab:   # <-- add encoding
         for i in range(args.n):
-            text, gt = synth_case(args)
+            text, gt = synth_case(args, assemble_report)
             rp = out / "reports" / f"case_{i:05d}.txt"
             with open(rp, "w", encoding="utf-8") as f:    # <-- add encoding
                 f.write(text)
@@ -7,7 +7,7 @@ staging_relevance score to surface what matters for staging/response.
 
 Creates subfolders:
   <out_dir>/patients/<PATIENT_ID>/<YYYY-MM-DD>/
-    - report.txt  (organ-structured FINDINGS + IMPRESSION)
+    - report.txt  (organ-structured FINDINGS + IMPRESSION, ordered/laid out per --style)
     - meta.json   (patient_id, study_date, timepoint, recist summary, complexity, relevance)
 
 Also writes a cohort-level index:
@@ -32,37 +32,80 @@ Notes:
 - PD uses RECIST 1.1 *nadir-based* rule (>=20% from nadir AND >=5 mm, or unequivocal new lesions).
 - FINDINGS text updates sizes for targets each follow-up so prose matches the RECIST table.
 - All file writes are UTF-8-safe.
+- --labels_only skips report.txt and narrative assembly (report_text is ""). Narrative text
+  draws from its own per-patient Random, so labels match a full run with the same seed.
 """
 
 # src/tumor/synth/gen_cohort.py
 from __future__ import annotations
 
 import argparse
-import json
+import io
+import os
 import random
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from types import MappingProxyType
+from typing import Callable, Dict, List, Tuple, Optional, Any
+
+import numpy as np
+import orjson
 
 from tumor.synth.gen_cap import (
     gen_primary, gen_ln, gen_met,
     recist_targets, apply_response_to_targets,
-    assemble_findings, assemble_impression, assemble_recist_block
+    assemble_findings, assemble_impression, assemble_recist_block,
+    REPORT_ASSEMBLERS
 )
 from tumor.synth.complexity import load_complexity, compute_staging_relevance
 
 
 # ------------------------- small utils -------------------------
 
-def rbool(p: float) -> bool:
-    return random.random() < p
+class UniformPool:
+    """Uniform [0, 1) draws pre-generated in batches from a numpy Generator; refilled when used up."""
+    __slots__ = ("_gen", "_size", "_buf", "_i")
 
-def iso(d: datetime) -> str:
-    return d.strftime("%Y-%m-%d")
+    def __init__(self, gen: np.random.Generator, size: int = 512):
+        self._gen = gen
+        self._size = size
+        self._buf: List[float] = []
+        self._i = 0
+
+    def random(self) -> float:
+        if self._i == len(self._buf):
+            self._buf = self._gen.random(self._size).tolist()
+            self._i = 0
+        v = self._buf[self._i]
+        self._i += 1
+        return v
+
+def rbool(p: float, rng: random.Random | UniformPool) -> bool:
+    return rng.random() < p
 
-def next_followup_date(d: datetime) -> datetime:
-    # ~8 weeks +/- 2 weeks
-    delta = 56 + random.randint(-14, 14)
+def iso(d: datetime) -> str:
+    # fixed format: skip strftime's format parsing
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+def make_study_dirs(pdir: str, study_dates: List[str]) -> List[str]:
+    """Create a patient's directory and all its study directories in one burst; returns the study paths."""
+    os.makedirs(pdir, exist_ok=True)
+    for d in set(study_dates):  # one mkdir per distinct date, no per-study stat
+        try:
+            os.mkdir(os.path.join(pdir, d))
+        except FileExistsError:
+            pass
+    return [os.path.join(pdir, d) for d in study_dates]
+
+def next_followup_date(d: datetime, jitter_days: int) -> datetime:
+    # ~8 weeks +/- 2 weeks (jitter_days in [-14, 14])
+    delta = 56 + jitter_days
     return d + timedelta(days=delta)
 
 def recist_overall_from_nadir(
@@ -85,30 +128,93 @@ def recist_overall_from_nadir(
         return "PD"
     return "SD"
 
+def index_structures(lns: List[Dict], mets: List[Dict]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Positions of the first node per station and first met per site (built once per patient)."""
+    ln_by_station: Dict[str, int] = {}
+    for j, ln in enumerate(lns):
+        ln_by_station.setdefault(ln.get("station"), j)
+    met_by_site: Dict[str, int] = {}
+    for j, m in enumerate(mets):
+        met_by_site.setdefault(m.get("site"), j)
+    return ln_by_station, met_by_site
+
 def update_structures_with_follow_targets(
-    primary: Dict, lns: List[Dict], mets: List[Dict], follow_targets: Optional[List[Dict]]
+    primary: Dict, lns: List[Dict], mets: List[Dict], follow_targets: Optional[List[Dict]],
+    ln_by_station: Dict[str, int], met_by_site: Dict[str, int]
 ) -> Tuple[Dict, List[Dict], List[Dict]]:
-    p = dict(primary)
-    ln_list = [dict(x) for x in lns]
-    m_list = [dict(x) for x in mets]
+    """
+    Return primary/nodes/mets with target sizes set to their follow-up values.
+    Copy-on-write: only structures that change are copied; the rest are shared with the inputs.
+    """
+    p = primary
+    ln_list = list(lns)
+    m_list = list(mets)
     if not follow_targets:
         return p, ln_list, m_list
     for t in follow_targets:
         if t["kind"] == "primary":
+            if p is primary:
+                p = dict(primary)
             p["size_mm"] = t["follow_mm"]
         elif t["kind"] == "ln":
-            for ln in ln_list:
-                if ln.get("station") == t.get("station"):
-                    ln["short_axis_mm"] = t["follow_mm"]
-                    break
+            j = ln_by_station.get(t.get("station"))
+            if j is not None:
+                if ln_list[j] is lns[j]:
+                    ln_list[j] = dict(lns[j])
+                ln_list[j]["short_axis_mm"] = t["follow_mm"]
         elif t["kind"] == "met":
-            for m in m_list:
-                if m.get("site") == t.get("site"):
-                    m["size_mm"] = t["follow_mm"]
-                    break
+            j = met_by_site.get(t.get("site"))
+            if j is not None:
+                if m_list[j] is mets[j]:
+                    m_list[j] = dict(mets[j])
+                m_list[j]["size_mm"] = t["follow_mm"]
     return p, ln_list, m_list
 
 # ---- Lesion catalog helpers ----
+@dataclass(slots=True)
+class Lesion:
+    """One row of the per-timepoint lesion catalog; kind-specific fields stay None otherwise."""
+    lesion_id: str
+    kind: str                       # "primary" | "ln" | "met"
+    organ: str
+    rule: str                       # "longest" | "short_axis"
+    baseline_mm: Optional[int]      # None if not selected as target
+    follow_mm: Optional[int]
+    size_mm_current: Optional[int]
+    suspicious: bool
+    target: bool                    # whether used as RECIST target
+    location: Optional[str] = None      # primary
+    margin: Optional[str] = None        # primary
+    enhancement: Optional[str] = None   # primary
+    station: Optional[str] = None       # ln
+    necrosis: Optional[bool] = None     # ln
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON row as written to meta.json / cohort index (only the fields for this kind)."""
+        d: Dict[str, Any] = {"lesion_id": self.lesion_id, "kind": self.kind, "organ": self.organ}
+        if self.kind == "primary":
+            d["location"] = self.location
+        elif self.kind == "ln":
+            d["station"] = self.station
+        d["rule"] = self.rule
+        d["baseline_mm"] = self.baseline_mm
+        d["follow_mm"] = self.follow_mm
+        d["size_mm_current"] = self.size_mm_current
+        if self.kind == "primary":
+            d["margin"] = self.margin
+            d["enhancement"] = self.enhancement
+        elif self.kind == "ln":
+            d["necrosis"] = self.necrosis
+        d["suspicious"] = self.suspicious
+        d["target"] = self.target
+        return d
+
+def _json_default(o: Any) -> Any:
+    # lets orjson serialize Lesion rows (with OPT_PASSTHROUGH_DATACLASS) without materializing dicts up front
+    if isinstance(o, Lesion):
+        return o.to_dict()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
 def _lesion_key(t: dict) -> str:
     # stable key for matching baseline ↔ follow
     if t["kind"] == "ln":
@@ -123,9 +229,9 @@ def build_lesion_catalog(
     mets: list[dict],
     base_targets: list[dict],
     follow_targets: list[dict] | None,
-) -> list[dict]:
+) -> list[Lesion]:
     """Return per-lesion rows with baseline/follow sizes + characteristics."""
-    catalog: list[dict] = []
+    catalog: list[Lesion] = []
 
     # index targets
     base_idx = { _lesion_key(t): t for t in base_targets }
@@ -133,53 +239,53 @@ def build_lesion_catalog(
 
     # primary
     pri_key = f"primary:{primary['site']}"
-    catalog.append({
-        "lesion_id": pri_key,
-        "kind": "primary",
-        "organ": primary["site"],
-        "location": primary.get("location"),
-        "rule": "longest",
-        "baseline_mm": base_idx.get(pri_key, {}).get("measure_mm"),   # None if not selected as target
-        "follow_mm": fol_idx.get(pri_key, {}).get("follow_mm"),
-        "size_mm_current": primary.get("size_mm"),
-        "margin": primary.get("margin"),
-        "enhancement": primary.get("enhancement"),
-        "suspicious": True,                 # primary is malignant
-        "target": pri_key in base_idx,      # whether used as RECIST target
-    })
+    catalog.append(Lesion(
+        lesion_id=pri_key,
+        kind="primary",
+        organ=primary["site"],
+        location=primary.get("location"),
+        rule="longest",
+        baseline_mm=base_idx.get(pri_key, {}).get("measure_mm"),
+        follow_mm=fol_idx.get(pri_key, {}).get("follow_mm"),
+        size_mm_current=primary.get("size_mm"),
+        margin=primary.get("margin"),
+        enhancement=primary.get("enhancement"),
+        suspicious=True,                    # primary is malignant
+        target=pri_key in base_idx,
+    ))
 
     # lymph nodes (report suspicious ones too: SA >= 10 mm)
     for ln in lns:
         key = f"ln:{ln['station']}"
         sa = ln["short_axis_mm"]
-        catalog.append({
-            "lesion_id": key,
-            "kind": "ln",
-            "organ": "lymph",
-            "station": ln["station"],
-            "rule": "short_axis",
-            "baseline_mm": base_idx.get(key, {}).get("measure_mm"),
-            "follow_mm": fol_idx.get(key, {}).get("follow_mm"),
-            "size_mm_current": sa,
-            "necrosis": bool(ln.get("necrosis")),
-            "suspicious": sa >= 10,          # ≥10 mm short axis considered suspicious
-            "target": key in base_idx,
-        })
+        catalog.append(Lesion(
+            lesion_id=key,
+            kind="ln",
+            organ="lymph",
+            station=ln["station"],
+            rule="short_axis",
+            baseline_mm=base_idx.get(key, {}).get("measure_mm"),
+            follow_mm=fol_idx.get(key, {}).get("follow_mm"),
+            size_mm_current=sa,
+            necrosis=bool(ln.get("necrosis")),
+            suspicious=sa >= 10,            # ≥10 mm short axis considered suspicious
+            target=key in base_idx,
+        ))
 
     # metastases
     for m in mets:
         key = f"met:{m['site']}"
-        catalog.append({
-            "lesion_id": key,
-            "kind": "met",
-            "organ": m["site"],
-            "rule": "longest",
-            "baseline_mm": base_idx.get(key, {}).get("measure_mm"),
-            "follow_mm": fol_idx.get(key, {}).get("follow_mm"),
-            "size_mm_current": m.get("size_mm"),
-            "suspicious": True,              # mets are malignant/suspicious by definition here
-            "target": key in base_idx,
-        })
+        catalog.append(Lesion(
+            lesion_id=key,
+            kind="met",
+            organ=m["site"],
+            rule="longest",
+            baseline_mm=base_idx.get(key, {}).get("measure_mm"),
+            follow_mm=fol_idx.get(key, {}).get("follow_mm"),
+            size_mm_current=m.get("size_mm"),
+            suspicious=True,                # mets are malignant/suspicious by definition here
+            target=key in base_idx,
+        ))
 
     return catalog
 
@@ -318,24 +424,26 @@ def merge_into_findings_by_organ(
         lines[idx] = _append_sentence(lines[idx], phr)
 
     # preface (e.g., limitations, comparison) at the top of FINDINGS
-    if preface_lines:
-        pre_text = "\n".join(preface_lines) + "\n"
-    else:
-        pre_text = ""
+    parts: List[str] = []
+    parts.extend(preface_lines)
+    parts.extend(lines)
+    return "\n".join(parts)
+
 
-    return pre_text + "\n".join(lines)
+# assemble_findings only reads these; one shared read-only mapping for every timepoint
+_NONMEAS_FLAGS_DEFAULT = MappingProxyType({"peritoneal_carcinomatosis": False})
 
 
 # ------------------------- trajectory -------------------------
 
-def pick_trajectory() -> List[str]:
+def pick_trajectory(rng: random.Random) -> List[str]:
     choices = [
         ["PR", "PR", "SD"],
         ["SD", "PD", "PD"],
         ["PR", "SD", "PD"],
         ["SD", "SD", "SD"],
     ]
-    return random.choice(choices)
+    return rng.choice(choices)
 
 
 # ------------------------- main cohort synth -------------------------
@@ -350,38 +458,58 @@ def synth_patient_course(
     primary_mix: List[str],
     min_tp: int,
     max_tp: int,
-    cx: Any
+    cx: Any,
+    rng: random.Random,
+    labels_only: bool = False,
+    sink: Optional[Callable[[Dict[str, Any]], None]] = None
 ) -> Dict[str, Any]:
+    """Simulate one patient's course. With sink, each study is handed to it as soon as it is built
+    (in date order) instead of being collected, and the returned "studies" list is empty."""
+    # batched numpy draws for the many Bernoulli gates; rng stays for one-shot picks
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    uniforms = UniformPool(np_rng)
+    # narrative text gets its own stream so skipping it (labels_only) leaves the label draws unchanged
+    text_rng = random.Random(rng.getrandbits(64))
+    assemble_report = REPORT_ASSEMBLERS[style]
+
     # Baseline disease
-    primary = gen_primary(random.choice(primary_mix))
+    primary = gen_primary(rng.choice(primary_mix))
     lns: List[Dict[str, Any]] = []
-    if primary["site"] == "lung" or rbool(0.4):
-        if rbool(0.6):
+    if primary["site"] == "lung" or rbool(0.4, uniforms):
+        if rbool(0.6, uniforms):
             lns.append(gen_ln("thoracic"))
-    if primary["site"] in ["colon", "pancreas", "kidney", "liver", "ovary", "prostate", "stomach"] or rbool(0.5):
-        if rbool(0.6):
+    if primary["site"] in ["colon", "pancreas", "kidney", "liver", "ovary", "prostate", "stomach"] or rbool(0.5, uniforms):
+        if rbool(0.6, uniforms):
             lns.append(gen_ln("abdominal"))
-        if rbool(0.4):
+        if rbool(0.4, uniforms):
             lns.append(gen_ln("pelvic"))
 
     mets: List[Dict[str, Any]] = []
-    if rbool(met_rate):
-        for _ in range(random.randint(1, 2)):
+    if rbool(met_rate, uniforms):
+        for _ in range(rng.randint(1, 2)):
             mets.append(gen_met())
 
+    # O(1) lookups from follow targets back to the baseline structures
+    ln_by_station, met_by_site = index_structures(lns, mets)
+
     # Baseline targets & SLD/nadir
     base_targets, _ = recist_targets(primary, lns, mets)
     base_sld = sum(t["measure_mm"] for t in base_targets)
     nadir_sld = base_sld
 
     # Timepoints
-    n_tp = random.randint(min_tp, max_tp)
-    day0 = datetime(2023, random.randint(1, 12), random.randint(1, 28))
-    dates = [day0] + [next_followup_date(day0)]
-    for _ in range(n_tp - 2):
-        dates.append(next_followup_date(dates[-1]))
-
-    traj = pick_trajectory()
+    n_tp = rng.randint(min_tp, max_tp)
+    day0 = datetime(2023, rng.randint(1, 12), rng.randint(1, 28))
+    jitter = np_rng.integers(-14, 15, size=1 + max(0, n_tp - 2)).tolist()
+    dates = [day0]
+    for j in jitter:
+        dates.append(next_followup_date(dates[-1], j))
+
+    traj = pick_trajectory(rng)
+    post_treat_sampler = cx.make_post_treatment_sampler(primary.get("site"))  # site is patient-constant
+    # constant for the run: every study's profile shares this one string
+    level_name = cx.level_name
+    level = int(level_name[1:])
     studies: List[Dict[str, Any]] = []
 
     for i, dt in enumerate(dates):
@@ -390,7 +518,7 @@ def synth_patient_course(
         limitation_line = cx.limitation_line(artifact)
         incidentals = cx.sample_incidentals()
         negatives = cx.sample_structured_negatives()
-        post_treat = cx.sample_post_treatment_effects(primary.get("site"))
+        post_treat = post_treat_sampler()
         hedge_phrase = cx.hedge_phrase_or_none()
         hedge_flag = "indeterminate" if hedge_phrase else "definite"
 
@@ -401,12 +529,11 @@ def synth_patient_course(
 
         if i == 0:
             recist_cat = "Baseline (no category)"
-            recist_text = assemble_recist_block(base_targets, [], has_new=False)
             p_cur, lns_cur, mets_cur = primary, lns, mets
         else:
             plan = traj[min(i - 1, len(traj) - 1)]
             follow_targets, _ = apply_response_to_targets(base_targets, plan)
-            has_new = (plan == "PD" and rbool(0.7)) or rbool(0.03)
+            has_new = (plan == "PD" and rbool(0.7, uniforms)) or rbool(0.03, uniforms)
 
             curr_sld = sum(t["follow_mm"] for t in follow_targets)
             nadir_sld = min(nadir_sld, curr_sld if curr_sld is not None else nadir_sld)
@@ -421,45 +548,54 @@ def synth_patient_course(
                 all_targets_disappeared=all_disappeared,
                 any_node_ge10=any_node_ge10
             )
-            recist_text = assemble_recist_block(base_targets, follow_targets, has_new)
-            p_cur, lns_cur, mets_cur = update_structures_with_follow_targets(primary, lns, mets, follow_targets)
-
-        # FINDINGS core text from your generator (organ-structured)
-        core_findings = assemble_findings(
-            p_cur, lns_cur, mets_cur, unit_mm_prob=unit_mix,
-            include_negatives=include_negatives, comparison="",  # comparison handled below
-            nonmeasurable_flags={"peritoneal_carcinomatosis": False}
-        )
+            p_cur, lns_cur, mets_cur = update_structures_with_follow_targets(
+                primary, lns, mets, follow_targets, ln_by_station, met_by_site
+            )
 
-        # Build preface lines that must live INSIDE FINDINGS (since you want only two sections)
-        preface_lines: List[str] = []
-        if limitation_line:
-            preface_lines.append(limitation_line)
-        if i > 0:
-            preface_lines.append(f"Comparison: {iso(dates[i - 1])}.")
-
-        # Merge incidentals/negatives/post-treatment into correct organ lines
-        merged_findings = merge_into_findings_by_organ(
-            raw_findings_text=core_findings,
-            incidentals=incidentals,
-            negatives=negatives,
-            post_treat=post_treat,
-            primary_site=primary.get("site"),
-            preface_lines=preface_lines
-        )
+        if labels_only:
+            # structured labels only: skip narrative assembly entirely
+            report_text = ""
+        else:
+            # RECIST summary block for the IMPRESSION
+            recist_text = assemble_recist_block(base_targets, follow_targets or [], has_new)
+
+            # FINDINGS core text from your generator (organ-structured)
+            core_findings = assemble_findings(
+                p_cur, lns_cur, mets_cur, unit_mm_prob=unit_mix,
+                include_negatives=include_negatives, comparison="",  # comparison handled below
+                nonmeasurable_flags=_NONMEAS_FLAGS_DEFAULT,
+                rng=text_rng
+            )
 
-        # IMPRESSION
-        impression_body = assemble_impression(
-            p_cur, lns_cur, mets_cur,
-            hedge=hedge_flag,
-            recist_text=recist_text,
-            recist_category=recist_cat
-        )
-        if hedge_phrase:
-            impression_body += f"\n\nComment: Some features are {hedge_phrase}; short-interval follow-up or problem-solving imaging may be considered."
+            # Build preface lines that must live INSIDE FINDINGS (since you want only two sections)
+            preface_lines: List[str] = []
+            if limitation_line:
+                preface_lines.append(limitation_line)
+            if i > 0:
+                preface_lines.append(f"Comparison: {iso(dates[i - 1])}.")
+
+            # Merge incidentals/negatives/post-treatment into correct organ lines
+            merged_findings = merge_into_findings_by_organ(
+                raw_findings_text=core_findings,
+                incidentals=incidentals,
+                negatives=negatives,
+                post_treat=post_treat,
+                primary_site=primary.get("site"),
+                preface_lines=preface_lines
+            )
+
+            # IMPRESSION
+            impression_body = assemble_impression(
+                p_cur, lns_cur, mets_cur,
+                hedge=hedge_flag,
+                recist_text=recist_text,
+                recist_category=recist_cat
+            )
+            if hedge_phrase:
+                impression_body += f"\n\nComment: Some features are {hedge_phrase}; short-interval follow-up or problem-solving imaging may be considered."
 
-        # FINAL REPORT: ONLY two sections by requirement
-        report_text = "FINDINGS:\n" + merged_findings + "\n\nIMPRESSION:\n" + impression_body + "\n"
+            # FINAL REPORT: ONLY two sections by requirement (no header)
+            report_text = assemble_report("", merged_findings, impression_body)
 
         # staging relevance
         node_thresh = cx.recist["node_thresholds_mm"]["target_short_axis_min"]
@@ -479,8 +615,8 @@ def synth_patient_course(
             used_equivocal_language=bool(hedge_phrase),
         )
         complexity_profile = {
-            "level": int(cx.level_name[1:]),
-            "level_name": cx.level_name,
+            "level": level,
+            "level_name": level_name,
             "artifact": artifact
         }
 
@@ -493,7 +629,7 @@ def synth_patient_course(
             follow_targets=follow_targets,
         )
 
-        studies.append({
+        study = {
             "patient_id": pid,
             "timepoint": i,
             "study_date": iso(dt),
@@ -512,18 +648,112 @@ def synth_patient_course(
                 "post_treatment": post_treat,
             'lesions': lesions
             }
-        })
+        }
+        if sink is not None:
+            sink(study)  # consumed before the next timepoint; the dict is not kept
+        else:
+            studies.append(study)
 
     return {
         "patient_id": pid,
         "baseline_date": iso(dates[0]),
-        "n_timepoints": len(studies),
+        "n_timepoints": len(dates),
         "studies": studies
     }
 
 
+# ------------------------- output encoding -------------------------
+
+# (study_date, report.txt bytes or None, meta.json bytes, cohort index line)
+EncodedStudy = Tuple[str, Optional[bytes], bytes, bytes]
+
+def encode_study(s: Dict[str, Any], labels_only: bool = False) -> EncodedStudy:
+    """
+    Serialize one study to its output bytes. Consumes s (it becomes the meta record).
+    Runs in the worker process so the parent only does raw writes.
+    """
+    # the study dict is not reused: turn it into the meta record in place
+    report_text = s.pop("report_text")
+    meta_bytes = orjson.dumps(
+        s, default=_json_default,
+        option=orjson.OPT_INDENT_2 | orjson.OPT_PASSTHROUGH_DATACLASS,
+    )
+
+    # cohort index line (FULL payload for dashboard; UTF-8, no ASCII escaping)
+    index_line = orjson.dumps({
+        "patient_id": s["patient_id"],
+        "study_date": s["study_date"],
+        "timepoint": s["timepoint"],
+
+        # full RECIST object (baseline/current/nadir + overall)
+        "recist": s["recist"],
+
+        # lesion-level details (targets + non-target suspicious)
+        # fields include: lesion_id, kind, organ, rule, target, baseline_mm, follow_mm,
+        # size_mm_current, margin/enhancement/necrosis when applicable
+        "lesions": s.get("extras", {}).get("lesions", []),
+
+        # complexity + relevance for triage
+        "complexity_profile": s.get("complexity_profile"),
+        "staging_relevance": s.get("staging_relevance"),
+
+        # optional context (inline with organ sections in your FINDINGS)
+        "incidentals": s.get("extras", {}).get("incidentals", []),
+        "negatives": s.get("extras", {}).get("negatives", []),
+        "post_treatment": s.get("extras", {}).get("post_treatment", []),
+
+        # include the rendered report so the app can show/preview it if desired
+        "report_text": report_text,
+    }, default=_json_default, option=orjson.OPT_PASSTHROUGH_DATACLASS) + b"\n"
+
+    report_bytes = None if labels_only else report_text.encode("utf-8")
+    return s["study_date"], report_bytes, meta_bytes, index_line
+
+
 # ------------------------- CLI -------------------------
 
+def _synth_patient_worker(i: int, seed: int, labels_only: bool, **kwargs: Any) -> Tuple[str, List[EncodedStudy]]:
+    """Build and encode patient i in a worker process; seeds derive from (seed, i) so output ignores scheduling."""
+    random.seed(hash((seed, i)) & 0xFFFFFFFF)  # gen_cap / complexity helpers draw from the module RNG
+    encoded: List[EncodedStudy] = []
+    patient = synth_patient_course(
+        pid=f"PID{i:06d}", rng=random.Random(f"{seed}:{i}"), labels_only=labels_only,
+        sink=lambda s: encoded.append(encode_study(s, labels_only)), **kwargs
+    )
+    return patient["patient_id"], encoded
+
+def _write_study(sdir: str, report_bytes: Optional[bytes], meta_bytes: bytes) -> None:
+    """Write one study's files (run on the I/O thread pool); report_bytes=None skips report.txt."""
+    if report_bytes is not None:
+        with open(os.path.join(sdir, "report.txt"), "wb", buffering=1 << 16) as f:
+            f.write(report_bytes)
+    with open(os.path.join(sdir, "meta.json"), "wb", buffering=1 << 16) as f:
+        f.write(meta_bytes)
+
+ARCHIVE_SUFFIX = {"tar": ".tar", "zip": ".zip"}
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)  # fixed entry times so archives are reproducible for a given seed
+
+def open_archive(path: Path, kind: str) -> tarfile.TarFile | zipfile.ZipFile:
+    if kind == "tar":
+        return tarfile.open(path, "w", bufsize=1 << 20)
+    return zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED)
+
+def archive_add(archive: tarfile.TarFile | zipfile.ZipFile, name: str, data: bytes) -> None:
+    """Append one in-memory file to the open cohort archive."""
+    if isinstance(archive, tarfile.TarFile):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        archive.addfile(info, io.BytesIO(data))
+    else:
+        archive.writestr(zipfile.ZipInfo(name, date_time=ZIP_EPOCH), data)
+
+def positive_int(s: str) -> int:
+    """argparse type for counts that must be at least 1 (e.g. --workers)."""
+    n = int(s)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {n}")
+    return n
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--out_dir", required=True)
@@ -540,68 +770,75 @@ def main():
                     default=["lung", "colon", "pancreas", "kidney", "liver", "ovary", "prostate", "stomach"])
     ap.add_argument("--complexity_config", type=str, default="configs/complexity.json")
     ap.add_argument("--complexity_level", type=int, choices=range(0, 6), default=2)
+    ap.add_argument("--labels_only", action="store_true",
+                    help="Skip report text (no report.txt; empty report_text); RECIST/lesion/complexity JSON only")
+    ap.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="Processes used to generate patients")
+    ap.add_argument("--archive", choices=["none", "tar", "zip"], default="none",
+                    help="Write patients/ into a single out_dir/cohort.{tar,zip} instead of per-study files")
     args = ap.parse_args()
 
-    random.seed(args.seed)
     out = Path(args.out_dir)
-    (out / "patients").mkdir(parents=True, exist_ok=True)
+    out.mkdir(parents=True, exist_ok=True)
+    if args.archive == "none":
+        (out / "patients").mkdir(exist_ok=True)
+        archive_path = None
+    else:
+        archive_path = out / f"cohort{ARCHIVE_SUFFIX[args.archive]}"
     cohort_labels = out / "cohort_labels.jsonl"
 
     cx = load_complexity(args.complexity_config, args.complexity_level)
-
-    with cohort_labels.open("w", encoding="utf-8") as idx:
-        for i in range(args.n_patients):
-            pid = f"PID{i:06d}"
-            patient = synth_patient_course(
-                pid=pid,
-                style=args.style,
-                include_negatives=args.include_negatives,
-                met_rate=args.met_rate,
-                uncertainty_mix=args.uncertainty_mix,
-                unit_mix=args.unit_mix,
-                primary_mix=args.primary_mix,
-                min_tp=args.min_tp,
-                max_tp=args.max_tp,
-                cx=cx,
-            )
-
-            pdir = out / "patients" / pid
-            for s in patient["studies"]:
-                sdir = pdir / s["study_date"]
-                sdir.mkdir(parents=True, exist_ok=True)
-                (sdir / "report.txt").write_text(s["report_text"], encoding="utf-8")
-                meta = {k: v for k, v in s.items() if k != "report_text"}
-                (sdir / "meta.json").write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
-
-                # Append to cohort index (FULL payload for dashboard; UTF-8, no ASCII escaping)
-                idx.write(json.dumps({
-                    "patient_id": s["patient_id"],
-                    "study_date": s["study_date"],
-                    "timepoint": s["timepoint"],
-
-                    # full RECIST object (baseline/current/nadir + overall)
-                    "recist": s["recist"],
-
-                    # lesion-level details (targets + non-target suspicious)
-                    # fields include: lesion_id, kind, organ, rule, target, baseline_mm, follow_mm,
-                    # size_mm_current, margin/enhancement/necrosis when applicable
-                    "lesions": s.get("extras", {}).get("lesions", []),
-
-                    # complexity + relevance for triage
-                    "complexity_profile": s.get("complexity_profile"),
-                    "staging_relevance": s.get("staging_relevance"),
-
-                    # optional context (inline with organ sections in your FINDINGS)
-                    "incidentals": s.get("extras", {}).get("incidentals", []),
-                    "negatives": s.get("extras", {}).get("negatives", []),
-                    "post_treatment": s.get("extras", {}).get("post_treatment", []),
-
-                    # include the rendered report so the app can show/preview it if desired
-                    "report_text": s["report_text"],
-                }, ensure_ascii=False) + "\n")
-
-
-    print(f"Generated {args.n_patients} patients at {out}/patients and index at {cohort_labels}")
+    patients_dir = os.path.join(str(out), "patients")  # plain strings: no Path objects per study
+
+    worker = partial(
+        _synth_patient_worker,
+        seed=args.seed,
+        style=args.style,
+        include_negatives=args.include_negatives,
+        met_rate=args.met_rate,
+        uncertainty_mix=args.uncertainty_mix,
+        unit_mix=args.unit_mix,
+        primary_mix=args.primary_mix,
+        min_tp=args.min_tp,
+        max_tp=args.max_tp,
+        cx=cx,
+        labels_only=args.labels_only,
+    )
+
+    # patients are generated in worker processes; all file/index writes stay in this process.
+    # file writes are I/O-bound: fan them out to threads, keep index appends on this thread (ordering)
+    # in archive mode entries are appended on this thread; cohort_labels.jsonl stays outside for streaming
+    with cohort_labels.open("wb", buffering=1 << 20) as idx, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool, \
+            ThreadPoolExecutor(max_workers=8) as writer, \
+            (open_archive(archive_path, args.archive) if archive_path else nullcontext()) as archive:
+        # map (not as_completed) so patients arrive in PID order and the index is reproducible
+        for pid, encoded in pool.map(worker, range(args.n_patients), chunksize=8):
+            if archive is not None:
+                for study_date, report_bytes, meta_bytes, _ in encoded:
+                    prefix = f"patients/{pid}/{study_date}/"
+                    if report_bytes is not None:
+                        archive_add(archive, prefix + "report.txt", report_bytes)
+                    archive_add(archive, prefix + "meta.json", meta_bytes)
+                idx.writelines(e[3] for e in encoded)
+                continue
+
+            # all study dates are known once the patient arrives: create its tree before any write
+            paths = make_study_dirs(os.path.join(patients_dir, pid), [e[0] for e in encoded])
+
+            pending = []
+            patient_index_lines: List[bytes] = []
+            for (_, report_bytes, meta_bytes, index_line), sdir in zip(encoded, paths):
+                pending.append(writer.submit(_write_study, sdir, report_bytes, meta_bytes))
+                patient_index_lines.append(index_line)
+
+            # finish this patient's files (and surface any write error) before moving on
+            for f in pending:
+                f.result()
+
+            # then its index lines in one batch into the 1 MiB buffer
+            idx.writelines(patient_index_lines)
+
+    print(f"Generated {args.n_patients} patients at {archive_path or out / 'patients'} and index at {cohort_labels}")
 
 if __name__ == "__main__":
     main()
@@ -1,512 +1,702 @@
-#  TO-DO: not generating output
-
-# # src/tumor/synth/gen_onc_notes.py
-# """
-# Synthetic Oncology Progress Notes Generator
-
-# Generates clinic progress notes for each synthetic patient, aligned to the
-# longitudinal CT CAP studies produced by tumor.synth.gen_cohort. Notes include:
-# - Oncologic history (primary, dx date, stage at dx)
-# - Current and prior lines of therapy
-# - Regimen details (components), cycle schedule (C{n}D{d}), and start dates
-# - Extractable fields: regimen name(s), components, cycle start dates, line of therapy,
-#   and RECIST response at nearest imaging timepoint.
-
-# Outputs (UTF-8):
-#   <out_dir>/patients/<PATIENT_ID>/notes/<YYYY-MM-DD>/note.txt
-#   <out_dir>/patients/<PATIENT_ID>/notes/<YYYY-MM-DD>/note.json   # structured label
-# And a cohort index:
-#   <out_dir>/notes_index.jsonl
-
-# Usage:
-#   python -m tumor.synth.gen_onc_notes ^
-#     --patients_root data/synth_patients/patients ^
-#     --out_dir data/synth_patients ^
-#     --seed 42 ^
-#     --notes_per_tp 1
-
-# If --patients_root is omitted, the script creates standalone patients with
-# 3-5 notes each (no imaging linkage).
-# """
-
-# import argparse
-# import json
-# import random
-# from datetime import datetime, timedelta
-# from pathlib import Path
-# from typing import Dict, List, Optional, Tuple
-
-# # --------------------------- regimen library ---------------------------
-
-# Regimen = Dict[str, object]
-
-# REGIMENS: Dict[str, Regimen] = {
-#     # GI
-#     "FOLFOX": {
-#         "components": ["oxaliplatin", "leucovorin", "5-fluorouracil"],
-#         "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},  # CxD1: all; CxD2: 5-FU pump day 2
-#         "cycle_length_days": 14,
-#         "indications": ["colon", "rectal", "stomach"],
-#         "synonyms": ["FOLFOX", "oxaliplatin + LV + 5-FU", "mFOLFOX6"],
-#     },
-#     "FOLFIRI": {
-#         "components": ["irinotecan", "leucovorin", "5-fluorouracil"],
-#         "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},
-#         "cycle_length_days": 14,
-#         "indications": ["colon", "rectal"],
-#         "synonyms": ["FOLFIRI", "irinotecan + LV + 5-FU"],
-#     },
-#     "FOLFIRINOX": {
-#         "components": ["oxaliplatin", "irinotecan", "leucovorin", "5-fluorouracil"],
-#         "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},
-#         "cycle_length_days": 14,
-#         "indications": ["pancreas"],
-#         "synonyms": ["FOLFIRINOX"],
-#     },
-#     # Lung / Ovary / General
-#     "Carboplatin + Paclitaxel": {
-#         "components": ["carboplatin", "paclitaxel"],
-#         "cycle_days": {1: ["all"]},
-#         "cycle_length_days": 21,
-#         "indications": ["lung", "ovary"],
-#         "synonyms": ["Carbo/Taxol", "carboplatin plus paclitaxel"],
-#     },
-#     # IO
-#     "Pembrolizumab": {
-#         "components": ["pembrolizumab"],
-#         "cycle_days": {1: ["all"]},
-#         "cycle_length_days": 21,  # could also be q6w; keep simple
-#         "indications": ["lung", "melanoma", "HNSCC", "stomach"],
-#         "synonyms": ["Keytruda", "pembro"],
-#     },
-#     "Atezolizumab + Bevacizumab": {
-#         "components": ["atezolizumab", "bevacizumab"],
-#         "cycle_days": {1: ["all"]},
-#         "cycle_length_days": 21,
-#         "indications": ["liver"],
-#         "synonyms": ["Atezo/Bev"],
-#     },
-# }
-
-# PRIMARY_TO_PLAUSIBLE = {
-#     "colon": ["FOLFOX", "FOLFIRI"],
-#     "stomach": ["FOLFOX", "Pembrolizumab"],
-#     "pancreas": ["FOLFIRINOX"],
-#     "liver": ["Atezolizumab + Bevacizumab", "FOLFOX"],
-#     "lung": ["Carboplatin + Paclitaxel", "Pembrolizumab"],
-#     "ovary": ["Carboplatin + Paclitaxel"],
-#     "prostate": ["Carboplatin + Paclitaxel"],  # placeholder
-#     "kidney": ["Pembrolizumab"],               # placeholder IO
-# }
-
-# SUPPORTIVE_MEDS = [
-#     "ondansetron", "dexamethasone", "aprepitant", "loperamide", "oxyCODONE prn",
-#     "filgrastim", "pegfilgrastim", "prochlorperazine"
-# ]
-
-
-# # --------------------------- utilities ---------------------------
-
-# def rbool(p: float) -> bool:
-#     return random.random() < p
-
-# def iso(d: datetime) -> str:
-#     return d.strftime("%Y-%m-%d")
-
-# def add_days(d: datetime, n: int) -> datetime:
-#     return d + timedelta(days=n)
-
-# def pick_regimen_for_primary(primary: str) -> str:
-#     opts = PRIMARY_TO_PLAUSIBLE.get(primary, list(REGIMENS.keys()))
-#     return random.choice(opts)
-
-# def pick_stage() -> str:
-#     return random.choice(["II", "III", "IV"])
-
-# def detect_primary_from_patient_dir(pid_dir: Path) -> Optional[str]:
-#     """Best-effort: look at first meta.json for clues (not strictly needed)."""
-#     # Placeholder: return None (we do not parse report text here)
-#     return None
-
-# def load_imaging_timeline(patients_root: Path, pid: str) -> List[Dict]:
-#     rows: List[Dict] = []
-#     for date_dir in sorted((patients_root / pid).glob("*")):
-#         meta = date_dir / "meta.json"
-#         if meta.exists():
-#             try:
-#                 obj = json.loads(meta.read_text(encoding="utf-8"))
-#                 rows.append(obj)
-#             except Exception:
-#                 pass
-#     rows.sort(key=lambda x: x.get("study_date", ""))
-#     return rows
-
-# def schedule_cycles(regimen_name: str, start: datetime, until: datetime) -> List[Dict]:
-#     reg = REGIMENS[regimen_name]
-#     cycle_len = int(reg["cycle_length_days"])
-#     # generate cycles up to 'until' date
-#     cycles = []
-#     i = 1
-#     d = start
-#     while d <= until:
-#         per_day = []
-#         for day, items in sorted(reg["cycle_days"].items()):
-#             day_date = add_days(d, day - 1)
-#             per_day.append({
-#                 "cycle": i,
-#                 "day": day,
-#                 "date": iso(day_date),
-#                 "administration": "all" if "all" in items else ", ".join(items)
-#             })
-#         cycles.append({
-#             "cycle": i,
-#             "start_date": iso(d),
-#             "events": per_day
-#         })
-#         i += 1
-#         d = add_days(d, cycle_len)
-#     return cycles
-
-# def find_current_cycle_day(cycles: List[Dict], on_date: datetime) -> Optional[Tuple[int,int]]:
-#     for c in cycles:
-#         for ev in c["events"]:
-#             if ev["date"] == iso(on_date):
-#                 return (c["cycle"], ev["day"])
-#     return None
-
-# def pick_note_date_near(reference: datetime) -> datetime:
-#     return reference + timedelta(days=random.randint(-2, 2))
-
-# def summarize_recist_at_date(imaging_rows: List[Dict], on_or_before: datetime) -> Optional[Dict]:
-#     cand = [r for r in imaging_rows if r.get("study_date") and r["study_date"] <= iso(on_or_before)]
-#     if not cand:
-#         return None
-#     last = cand[-1]
-#     recist = last.get("recist", {})
-#     return {
-#         "study_date": last.get("study_date"),
-#         "overall_response": recist.get("overall_response"),
-#         "baseline_sld_mm": recist.get("baseline_sld_mm"),
-#         "current_sld_mm": recist.get("current_sld_mm"),
-#         "nadir_sld_mm": recist.get("nadir_sld_mm"),
-#     }
-
-# def choose_regimen_synonym(regimen_name: str) -> str:
-#     syns = REGIMENS[regimen_name].get("synonyms", [regimen_name])
-#     return random.choice(syns) if syns else regimen_name
-
-# # --------------------------- note text ---------------------------
-
-# def render_note_text(
-#     patient_id: str,
-#     encounter_date: datetime,
-#     primary_site: str,
-#     dx_date: datetime,
-#     stage_at_dx: str,
-#     lines: List[Dict],
-#     current_line: int,
-#     current_regimen: str,
-#     current_cycle_day: Optional[Tuple[int,int]],
-#     recist_summary: Optional[Dict],
-# ) -> str:
-#     enc = iso(encounter_date)
-#     dx_iso = iso(dx_date)
-#     syn_name = choose_regimen_synonym(current_regimen)
-
-#     history_lines = []
-#     history_lines.append(f"Primary: {primary_site.capitalize()}, diagnosed {dx_iso}. Stage at dx: {stage_at_dx}.")
-#     if recist_summary:
-#         history_lines.append(
-#             f"Most recent imaging {recist_summary['study_date']}: RECIST overall {recist_summary['overall_response']}, "
-#             f"SLD baseline {recist_summary.get('baseline_sld_mm','')}, current {recist_summary.get('current_sld_mm','')}, "
-#             f"nadir {recist_summary.get('nadir_sld_mm','')}."
-#         )
-#     history = " ".join(history_lines)
-
-#     ther_hist = []
-#     for ln in lines:
-#         stop = f", stop {ln['stop_date']}" if ln.get("stop_date") else ""
-#         ther_hist.append(
-#             f"{ln['line']}L: {ln['regimen']} (start {ln['start_date']}{stop}); components: {', '.join(ln['components'])}."
-#         )
-#     therapy_history = "\n  - " + "\n  - ".join(ther_hist) if ther_hist else "  - none recorded"
-
-#     cycle_str = ""
-#     if current_cycle_day:
-#         cycle_str = f"C{current_cycle_day[0]}D{current_cycle_day[1]}"
-#     plan_line = f"Continue {syn_name} as tolerated." if not recist_summary or recist_summary.get("overall_response") in (None, "SD", "PR", "CR") else f"Plan to switch therapy pending progression review."
-
-#     supportive = ", ".join(sorted(set(random.sample(SUPPORTIVE_MEDS, k=random.randint(2, 4)))))
-
-#     text = f"""Oncology Clinic Progress Note
-# Patient: {patient_id}
-# Date: {enc}
-
-# Oncologic History:
-#   {history}
-
-# Therapy History:
-# {therapy_history}
-
-# Interval History:
-#   Reports expected toxicities; eating and drinking adequately. No emergent issues.
-
-# Current Treatment:
-#   Line: {current_line}L
-#   Regimen: {syn_name}
-#   Status: {"on-treatment" if current_cycle_day else "off-cycle"}
-#   {("Today is " + cycle_str) if cycle_str else "Not a treatment day today."}
-#   Supportive meds: {supportive}
-
-# Assessment:
-#   Solid malignancy with ongoing systemic therapy. Performance status ECOG 1.
-#   Imaging-based response as above.
-
-# Plan:
-#   {plan_line}
-#   Continue labs and symptom management; return for next visit per protocol.
-# """.rstrip() + "\n"
-#     return text
-
-# # --------------------------- core generation ---------------------------
-
-# def synth_patient_notes_for_existing(
-#     patients_root: Path,
-#     out_root: Path,
-#     pid: str,
-#     notes_per_tp: int = 1,
-# ) -> List[Dict]:
-#     """Create notes aligned to imaging timepoints under the patient's folder."""
-#     imaging = load_imaging_timeline(patients_root, pid)
-#     if not imaging:
-#         return []
-
-#     # crude primary guess; otherwise pick common site
-#     primary = detect_primary_from_patient_dir(patients_root / pid) or random.choice(
-#         ["colon", "lung", "pancreas", "stomach", "liver", "ovary"]
-#     )
-#     stage = pick_stage()
-#     dx_date = datetime.strptime(imaging[0]["study_date"], "%Y-%m-%d") - timedelta(days=random.randint(30, 240))
-
-#     # Start with a 1L regimen around baseline
-#     regimen_name = pick_regimen_for_primary(primary)
-#     regimen = REGIMENS[regimen_name]
-#     start_c1d1 = datetime.strptime(imaging[0]["study_date"], "%Y-%m-%d") - timedelta(days=random.randint(0, 14))
-#     end_horizon = datetime.strptime(imaging[-1]["study_date"], "%Y-%m-%d") + timedelta(days=30)
-#     cycles = schedule_cycles(regimen_name, start_c1d1, end_horizon)
-
-#     lines: List[Dict] = [{
-#         "line": 1,
-#         "regimen": regimen_name,
-#         "components": regimen["components"],
-#         "start_date": iso(start_c1d1),
-#         "stop_date": None,
-#         "cycles": cycles,
-#     }]
-#     current_line = 1
-
-#     # If imaging shows PD at any timepoint, switch to next line starting soon after that date
-#     for row in imaging[1:]:
-#         if (row.get("recist") or {}).get("overall_response") == "PD":
-#             # start 2L approximately 7-14 days after PD study date
-#             switch_date = datetime.strptime(row["study_date"], "%Y-%m-%d") + timedelta(days=random.randint(7, 14))
-#             current_line += 1
-#             # close prior line stop_date
-#             if lines[-1]["stop_date"] is None:
-#                 lines[-1]["stop_date"] = iso(switch_date)
-#             # choose a different regimen if possible
-#             new_regimen_name = random.choice([r for r in PRIMARY_TO_PLAUSIBLE.get(primary, list(REGIMENS.keys()))
-#                                               if r != lines[-1]["regimen"]] or [lines[-1]["regimen"]])
-#             new_regimen = REGIMENS[new_regimen_name]
-#             new_cycles = schedule_cycles(new_regimen_name, switch_date, end_horizon)
-#             lines.append({
-#                 "line": current_line,
-#                 "regimen": new_regimen_name,
-#                 "components": new_regimen["components"],
-#                 "start_date": iso(switch_date),
-#                 "stop_date": None,
-#                 "cycles": new_cycles,
-#             })
-
-#     notes_index: List[Dict] = []
-#     for tp, row in enumerate(imaging):
-#         study_date = datetime.strptime(row["study_date"], "%Y-%m-%d")
-#         recist_summary = summarize_recist_at_date(imaging, study_date)
-#         # pick which line is active on this date
-#         active_line_idx = 0
-#         for i, ln in enumerate(lines):
-#             start_dt = datetime.strptime(ln["start_date"], "%Y-%m-%d")
-#             stop_dt = datetime.max if ln["stop_date"] is None else datetime.strptime(ln["stop_date"], "%Y-%m-%d")
-#             if start_dt <= study_date <= stop_dt:
-#                 active_line_idx = i
-#                 break
-#         active = lines[active_line_idx]
-#         # find if today is a treatment event (C?D?)
-#         cday = find_current_cycle_day(active["cycles"], study_date)
-
-#         for k in range(notes_per_tp):
-#             # place note near study date
-#             note_date = pick_note_date_near(study_date)
-#             # render text
-#             text = render_note_text(
-#                 patient_id=pid,
-#                 encounter_date=note_date,
-#                 primary_site=primary,
-#                 dx_date=dx_date,
-#                 stage_at_dx=stage,
-#                 lines=lines,
-#                 current_line=active["line"],
-#                 current_regimen=active["regimen"],
-#                 current_cycle_day=cday if k == 0 else None,  # only first note of tp marked as treatment day
-#                 recist_summary=recist_summary
-#             )
-#             # structured label for easy IE training
-#             label = {
-#                 "patient_id": pid,
-#                 "encounter_date": iso(note_date),
-#                 "primary_site": primary,
-#                 "stage_at_dx": stage,
-#                 "oncologic_history": {
-#                     "diagnosis_date": iso(dx_date),
-#                 },
-#                 "lines": [
-#                     {
-#                         "line": ln["line"],
-#                         "regimen": ln["regimen"],
-#                         "components": ln["components"],
-#                         "start_date": ln["start_date"],
-#                         "stop_date": ln["stop_date"],
-#                         "cycles": ln["cycles"],  # includes per-event CxDy with dates
-#                     } for ln in lines
-#                 ],
-#                 "active_line": active["line"],
-#                 "active_regimen": active["regimen"],
-#                 "active_cycle_day": None if not cday else {"cycle": cday[0], "day": cday[1], "date": iso(study_date)},
-#                 "recist": recist_summary,
-#             }
-
-#             # write files
-#             note_dir = out_root / "patients" / pid / "notes" / iso(note_date)
-#             note_dir.mkdir(parents=True, exist_ok=True)
-#             (note_dir / "note.txt").write_text(text, encoding="utf-8")
-#             (note_dir / "note.json").write_text(json.dumps(label, ensure_ascii=False, indent=2), encoding="utf-8")
-
-#             notes_index.append({
-#                 "patient_id": pid,
-#                 "encounter_date": iso(note_date),
-#                 "line": active["line"],
-#                 "regimen": active["regimen"],
-#                 "is_treatment_day": bool(cday and k == 0),
-#                 "has_imaging_on_or_before": bool(recist_summary),
-#                 "overall_response": recist_summary.get("overall_response") if recist_summary else None,
-#             })
-
-#     return notes_index
-
-
-# def synth_patient_notes_standalone(
-#     out_root: Path,
-#     pid: str,
-# ) -> List[Dict]:
-#     """If no imaging exists, generate 3-5 notes and a simple 1L course."""
-#     primary = random.choice(["colon", "lung", "pancreas", "stomach"])
-#     stage = pick_stage()
-#     today = datetime(2024, random.randint(1, 12), random.randint(1, 28))
-#     dx_date = today - timedelta(days=random.randint(60, 300))
-#     regimen_name = pick_regimen_for_primary(primary)
-#     start_c1d1 = today - timedelta(days=random.randint(0, 21))
-#     cycles = schedule_cycles(regimen_name, start_c1d1, today + timedelta(days=120))
-
-#     lines = [{
-#         "line": 1,
-#         "regimen": regimen_name,
-#         "components": REGIMENS[regimen_name]["components"],
-#         "start_date": iso(start_c1d1),
-#         "stop_date": None,
-#         "cycles": cycles,
-#     }]
-
-#     notes_index: List[Dict] = []
-#     n_notes = random.randint(3, 5)
-#     curr = today
-#     for i in range(n_notes):
-#         note_date = curr + timedelta(days=i * 21)
-#         cday = find_current_cycle_day(cycles, note_date)
-#         text = render_note_text(
-#             patient_id=pid,
-#             encounter_date=note_date,
-#             primary_site=primary,
-#             dx_date=dx_date,
-#             stage_at_dx=stage,
-#             lines=lines,
-#             current_line=1,
-#             current_regimen=regimen_name,
-#             current_cycle_day=cday,
-#             recist_summary=None
-#         )
-#         label = {
-#             "patient_id": pid,
-#             "encounter_date": iso(note_date),
-#             "primary_site": primary,
-#             "stage_at_dx": stage,
-#             "oncologic_history": {"diagnosis_date": iso(dx_date)},
-#             "lines": lines,
-#             "active_line": 1,
-#             "active_regimen": regimen_name,
-#             "active_cycle_day": None if not cday else {"cycle": cday[0], "day": cday[1], "date": iso(note_date)},
-#             "recist": None,
-#         }
-#         note_dir = out_root / "patients" / pid / "notes" / iso(note_date)
-#         note_dir.mkdir(parents=True, exist_ok=True)
-#         (note_dir / "note.txt").write_text(text, encoding="utf-8")
-#         (note_dir / "note.json").write_text(json.dumps(label, ensure_ascii=False, indent=2), encoding="utf-8")
-
-#         notes_index.append({
-#             "patient_id": pid,
-#             "encounter_date": iso(note_date),
-#             "line": 1,
-#             "regimen": regimen_name,
-#             "is_treatment_day": bool(cday),
-#             "has_imaging_on_or_before": False,
-#             "overall_response": None,
-#         })
-#     return notes_index
-
-# # --------------------------- CLI ---------------------------
-
-# def main():
-#     ap = argparse.ArgumentParser()
-#     ap.add_argument("--patients_root", type=str, default="", help="Path to patients dir with imaging meta.json (e.g., data/synth_patients/patients)")
-#     ap.add_argument("--out_dir", type=str, required=True, help="Root where notes will be written (usually same parent as patients_root)")
-#     ap.add_argument("--seed", type=int, default=0)
-#     ap.add_argument("--notes_per_tp", type=int, default=1, help="Notes per imaging timepoint (e.g., clinic + infusion)")
-#     args = ap.parse_args()
-
-#     random.seed(args.seed)
-#     out_root = Path(args.out_dir)
-#     out_root.mkdir(parents=True, exist_ok=True)
-#     notes_index_path = out_root / "notes_index.jsonl"
-
-#     all_rows: List[Dict] = []
-
-#     if args.patients_root:
-#         patients_root = Path(args.patients_root)
-#         pids = sorted([p.name for p in patients_root.iterdir() if p.is_dir()])
-#         for pid in pids:
-#             rows = synth_patient_notes_for_existing(patients_root, out_root, pid, notes_per_tp=args.notes_per_tp)
-#             all_rows.extend(rows)
-#     else:
-#         # standalone mode: synthesize a few patients without imaging
-#         for i in range(10):
-#             pid = f"PID{i:06d}"
-#             rows = synth_patient_notes_standalone(out_root, pid)
-#             all_rows.extend(rows)
-
-#     with notes_index_path.open("w", encoding="utf-8") as idx:
-#         for r in all_rows:
-#             idx.write(json.dumps(r) + "\n")
-
-#     print(f"Generated notes for {len(set(r['patient_id'] for r in all_rows))} patients. Index at {notes_index_path}")
-
-# if __name__ == "__main__":
-#     main()
+# src/tumor/synth/gen_onc_notes.py
+"""
+Synthetic Oncology Progress Notes Generator
+
+Generates clinic progress notes for each synthetic patient, aligned to the
+longitudinal CT CAP studies produced by tumor.synth.gen_cohort. Notes include:
+- Oncologic history (primary, dx date, stage at dx)
+- Current and prior lines of therapy
+- Regimen details (components), cycle schedule (C{n}D{d}), and start dates
+- Extractable fields: regimen name(s), components, cycle start dates, line of therapy,
+  and RECIST response at nearest imaging timepoint.
+
+Outputs (UTF-8):
+  <out_dir>/patients/<PATIENT_ID>/notes/<YYYY-MM-DD>/note.txt
+  <out_dir>/patients/<PATIENT_ID>/notes/<YYYY-MM-DD>/note.json   # structured label
+  <out_dir>/patients/<PATIENT_ID>/therapy.json   # lines of therapy, shared by the patient's labels via "lines_ref"
+And a cohort index:
+  <out_dir>/notes_index.jsonl
+note.json / therapy.json are single-line JSON; pass --pretty for indented output.
+With --bundle zip|tar, each patient's notes/ and therapy.json are packed into
+<PATIENT_ID>/notes.{zip,tar}; read their labels with load_bundled_note_labels().
+
+Usage:
+  python -m tumor.synth.gen_onc_notes ^
+    --patients_root data/synth_patients/patients ^
+    --out_dir data/synth_patients ^
+    --seed 42 ^
+    --notes_per_tp 1
+
+If --patients_root is omitted, the script creates standalone patients with
+3-5 notes each (no imaging linkage).
+"""
+
+import argparse
+import bisect
+import io
+import json
+import os
+import posixpath
+import random
+import sys
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# C serializer when available. The stdlib fallback uses the same layout (UTF-8, no ASCII escaping,
+# compact or 2-space separators), so notes and labels come out byte-identical; orjson and json would
+# only disagree on values these files never hold (e.g. float exponent spelling, non-str keys).
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    loads = orjson.loads
+
+    def dumps_pretty(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+
+    def dumps_line(obj: Any) -> bytes:
+        return orjson.dumps(obj)
+else:
+    loads = json.loads
+
+    def dumps_pretty(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def dumps_line(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# --------------------------- regimen library ---------------------------
+
+Regimen = Dict[str, object]
+
+REGIMENS: Dict[str, Regimen] = {
+    # GI
+    "FOLFOX": {
+        "components": ["oxaliplatin", "leucovorin", "5-fluorouracil"],
+        "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},  # CxD1: all; CxD2: 5-FU pump day 2
+        "cycle_length_days": 14,
+        "indications": ["colon", "rectal", "stomach"],
+        "synonyms": ["FOLFOX", "oxaliplatin + LV + 5-FU", "mFOLFOX6"],
+    },
+    "FOLFIRI": {
+        "components": ["irinotecan", "leucovorin", "5-fluorouracil"],
+        "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},
+        "cycle_length_days": 14,
+        "indications": ["colon", "rectal"],
+        "synonyms": ["FOLFIRI", "irinotecan + LV + 5-FU"],
+    },
+    "FOLFIRINOX": {
+        "components": ["oxaliplatin", "irinotecan", "leucovorin", "5-fluorouracil"],
+        "cycle_days": {1: ["all"], 2: ["5-fluorouracil (infusion)"]},
+        "cycle_length_days": 14,
+        "indications": ["pancreas"],
+        "synonyms": ["FOLFIRINOX"],
+    },
+    # Lung / Ovary / General
+    "Carboplatin + Paclitaxel": {
+        "components": ["carboplatin", "paclitaxel"],
+        "cycle_days": {1: ["all"]},
+        "cycle_length_days": 21,
+        "indications": ["lung", "ovary"],
+        "synonyms": ["Carbo/Taxol", "carboplatin plus paclitaxel"],
+    },
+    # IO
+    "Pembrolizumab": {
+        "components": ["pembrolizumab"],
+        "cycle_days": {1: ["all"]},
+        "cycle_length_days": 21,  # could also be q6w; keep simple
+        "indications": ["lung", "melanoma", "HNSCC", "stomach"],
+        "synonyms": ["Keytruda", "pembro"],
+    },
+    "Atezolizumab + Bevacizumab": {
+        "components": ["atezolizumab", "bevacizumab"],
+        "cycle_days": {1: ["all"]},
+        "cycle_length_days": 21,
+        "indications": ["liver"],
+        "synonyms": ["Atezo/Bev"],
+    },
+}
+
+# regimen vocabularies are tiny and fixed: intern them once and share the same tuple objects in every label
+for _reg in REGIMENS.values():
+    _reg["components"] = tuple(sys.intern(c) for c in _reg["components"])
+    _reg["synonyms"] = tuple(sys.intern(s) for s in _reg["synonyms"])
+
+REGIMENS_KEYS = tuple(REGIMENS)  # fallback options for primaries without a plausible list
+
+PRIMARY_TO_PLAUSIBLE = {
+    sys.intern(primary): tuple(sys.intern(r) for r in regimens)
+    for primary, regimens in (
+        ("colon", ("FOLFOX", "FOLFIRI")),
+        ("stomach", ("FOLFOX", "Pembrolizumab")),
+        ("pancreas", ("FOLFIRINOX",)),
+        ("liver", ("Atezolizumab + Bevacizumab", "FOLFOX")),
+        ("lung", ("Carboplatin + Paclitaxel", "Pembrolizumab")),
+        ("ovary", ("Carboplatin + Paclitaxel",)),
+        ("prostate", ("Carboplatin + Paclitaxel",)),  # placeholder
+        ("kidney", ("Pembrolizumab",)),               # placeholder IO
+    )
+}
+
+STAGES = ("II", "III", "IV")
+EXISTING_PRIMARIES = ("colon", "lung", "pancreas", "stomach", "liver", "ovary")
+STANDALONE_PRIMARIES = ("colon", "lung", "pancreas", "stomach")
+CONTINUE_RESPONSES = (None, "SD", "PR", "CR")  # responses that keep the current regimen in the plan
+
+SUPPORTIVE_MEDS = [
+    "ondansetron", "dexamethasone", "aprepitant", "loperamide", "oxyCODONE prn",
+    "filgrastim", "pegfilgrastim", "prochlorperazine"
+]
+
+
+# --------------------------- utilities ---------------------------
+
+def rbool(p: float, rng: random.Random) -> bool:
+    return rng.random() < p
+
+def iso(d: datetime) -> str:
+    return _iso(d.toordinal())
+
+@lru_cache(maxsize=16384)
+def _iso(ordinal: int) -> str:
+    """YYYY-MM-DD for a day ordinal; cycle, note and study dates repeat heavily within a run."""
+    d = date.fromordinal(ordinal)
+    return f"{d.year:04d}-{d.month:02d}-{d.day:02d}"
+
+@lru_cache(maxsize=4096)
+def _parse(s: str) -> datetime:
+    """Parse a YYYY-MM-DD study/line date; the same dates recur across a patient's timepoints."""
+    return datetime.fromisoformat(s)
+
+def add_days(d: datetime, n: int) -> datetime:
+    return d + timedelta(days=n)
+
+def pick_regimen_for_primary(primary: str, rng: random.Random) -> str:
+    opts = PRIMARY_TO_PLAUSIBLE.get(primary, REGIMENS_KEYS)
+    return rng.choice(opts)
+
+def pick_stage(rng: random.Random) -> str:
+    return rng.choice(STAGES)
+
+def detect_primary_from_patient_dir(pid_dir: Path) -> Optional[str]:
+    """Best-effort: look at first meta.json for clues (not strictly needed)."""
+    # Placeholder: return None (we do not parse report text here)
+    return None
+
+IMAGING_FIELDS = ("study_date", "recist")  # meta.json keys kept per imaging row
+
+def load_imaging_timeline(patients_root: Path, pid: str) -> List[Dict]:
+    rows: List[Dict] = []
+    # scandir entries carry their type, so no extra stat per date dir
+    with os.scandir(patients_root / pid) as it:
+        date_dirs = sorted(e.path for e in it if e.is_dir())
+    for date_dir in date_dirs:
+        try:  # open directly instead of exists() first: dirs without meta.json (e.g. notes/) just fail here
+            with open(os.path.join(date_dir, "meta.json"), "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        try:
+            obj = loads(data)
+        except Exception:
+            continue
+        # only the date and RECIST block are used downstream; drop the rest of meta.json now
+        rows.append({k: obj[k] for k in IMAGING_FIELDS if k in obj})
+    rows.sort(key=lambda x: x.get("study_date", ""))
+    return rows
+
+# event date (ISO) -> (cycle, day)
+CycleDateIndex = Dict[str, Tuple[int, int]]
+
+def schedule_cycles(regimen_name: str, start: datetime, until: datetime) -> Tuple[List[Dict], CycleDateIndex]:
+    """Cycle schedule for a regimen from start to until, plus its event-date index."""
+    cycles = _build_cycles(regimen_name, start, until)
+    date_index: CycleDateIndex = {}
+    for c in cycles:
+        for ev in c["events"]:
+            date_index.setdefault(ev["date"], (c["cycle"], ev["day"]))  # first event wins, as the old scan did
+    return cycles, date_index
+
+# per regimen: ((day, administration string), ...) in day order, resolved once
+_CYCLE_ADMIN: Dict[str, Tuple[Tuple[int, str], ...]] = {
+    name: tuple((day, "all" if "all" in items else ", ".join(items)) for day, items in sorted(reg["cycle_days"].items()))
+    for name, reg in REGIMENS.items()
+}
+
+def _build_cycles(regimen_name: str, start: datetime, until: datetime) -> List[Dict]:
+    reg = REGIMENS[regimen_name]
+    admin_days = _CYCLE_ADMIN[regimen_name]
+    cycle_len = int(reg["cycle_length_days"])
+    # generate cycles up to 'until' date
+    cycles = []
+    i = 1
+    d = start
+    while d <= until:
+        per_day = []
+        for day, administration in admin_days:
+            day_date = add_days(d, day - 1)
+            per_day.append({
+                "cycle": i,
+                "day": day,
+                "date": iso(day_date),
+                "administration": administration
+            })
+        cycles.append({
+            "cycle": i,
+            "start_date": iso(d),
+            "events": per_day
+        })
+        i += 1
+        d = add_days(d, cycle_len)
+    return cycles
+
+def find_current_cycle_day(date_index: CycleDateIndex, on_date: datetime) -> Optional[Tuple[int,int]]:
+    return date_index.get(iso(on_date))
+
+def pick_note_date_near(reference: datetime, rng: random.Random) -> datetime:
+    return reference + timedelta(days=rng.randint(-2, 2))
+
+def summarize_recist_timeline(imaging_rows: List[Dict]) -> List[Dict]:
+    """RECIST summary of the latest study on or before each row's date, for date-sorted rows, in one pass."""
+    out: List[Dict] = [None] * len(imaging_rows)
+    summary = None
+    # walk backwards so rows sharing a date all get the last of them
+    for i in range(len(imaging_rows) - 1, -1, -1):
+        last = imaging_rows[i]
+        if summary is None or imaging_rows[i + 1]["study_date"] != last["study_date"]:
+            recist = last.get("recist", {})
+            response = recist.get("overall_response")
+            summary = {
+                "study_date": last.get("study_date"),
+                # parsed fresh per meta.json; intern so every label shares the few response codes
+                "overall_response": sys.intern(response) if isinstance(response, str) else response,
+                "baseline_sld_mm": recist.get("baseline_sld_mm"),
+                "current_sld_mm": recist.get("current_sld_mm"),
+                "nadir_sld_mm": recist.get("nadir_sld_mm"),
+            }
+        out[i] = summary
+    return out
+
+def choose_regimen_synonym(regimen_name: str, rng: random.Random) -> str:
+    syns = REGIMENS[regimen_name].get("synonyms", [regimen_name])
+    return rng.choice(syns) if syns else regimen_name
+
+THERAPY_REF = "../../therapy.json"  # from notes/<date>/ back to the patient's therapy.json
+
+def therapy_json(pid: str, lines: List[Dict], ser: Callable[[Any], bytes]) -> bytes:
+    return ser({"patient_id": pid, "lines": lines})
+
+def _inline_lines(label: Dict, read_ref: Callable[[str], bytes]) -> Dict:
+    ref = label.pop("lines_ref", None)
+    if ref is not None:
+        label["lines"] = json.loads(read_ref(ref))["lines"]
+    return label
+
+def load_note_label(note_json: Path) -> Dict:
+    """Read a note.json and inline its patient's lines of therapy (resolved from lines_ref) as label["lines"]."""
+    label = json.loads(note_json.read_bytes())
+    return _inline_lines(label, lambda ref: (note_json.parent / ref).read_bytes())
+
+def load_bundled_note_labels(bundle: Path) -> Dict[str, Dict]:
+    """Read every note.json in a notes.zip / notes.tar written by --bundle, keyed by member name
+    (e.g. "notes/2023-03-15/note.json"), with lines inlined as in load_note_label."""
+    if bundle.suffix == ".zip":
+        with zipfile.ZipFile(bundle) as zf:
+            members = {name: zf.read(name) for name in zf.namelist()}
+    else:
+        with tarfile.open(bundle) as tf:
+            members = {m.name: tf.extractfile(m).read() for m in tf.getmembers() if m.isfile()}
+    labels: Dict[str, Dict] = {}
+    for name, data in members.items():
+        if posixpath.basename(name) == "note.json":
+            base = posixpath.dirname(name)
+            labels[name] = _inline_lines(json.loads(data), lambda ref: members[posixpath.normpath(posixpath.join(base, ref))])
+    return labels
+
+def flush_note_writes(pending: List[Tuple[Path, bytes]]) -> None:
+    """Write a patient's buffered note files: one mkdir per distinct directory, then files in order."""
+    for d in dict.fromkeys(path.parent for path, _ in pending):
+        d.mkdir(parents=True, exist_ok=True)
+    for path, data in pending:  # original order, so a repeated note date still keeps the last note
+        with open(path, "wb", buffering=1 << 16) as f:
+            f.write(data)
+
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)  # fixed entry times so bundles are reproducible for a given seed
+
+def bundle_note_writes(patient_dir: Path, pending: List[Tuple[Path, bytes]], kind: str) -> None:
+    """Pack a patient's buffered files into patient_dir/notes.{zip,tar}, named relative to patient_dir
+    (so note labels' lines_ref still resolves inside the bundle)."""
+    entries = dict(pending)  # a repeated path keeps its last contents, as overwriting the file did
+    patient_dir.mkdir(parents=True, exist_ok=True)
+    path = patient_dir / f"notes.{kind}"
+    if kind == "zip":
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for p, data in entries.items():
+                zf.writestr(zipfile.ZipInfo(p.relative_to(patient_dir).as_posix(), date_time=ZIP_EPOCH), data)
+    else:
+        with tarfile.open(path, "w") as tf:
+            for p, data in entries.items():
+                info = tarfile.TarInfo(p.relative_to(patient_dir).as_posix())
+                info.size = len(data)
+                tf.addfile(info, io.BytesIO(data))
+
+def write_patient_files(patient_dir: Path, pending: List[Tuple[Path, bytes]], bundle: str) -> None:
+    if bundle == "none":
+        flush_note_writes(pending)
+    else:
+        bundle_note_writes(patient_dir, pending, bundle)
+
+# --------------------------- note text ---------------------------
+
+# static text of the note, split around its interpolated fields (see render_note_text)
+_NOTE_PARTS: Tuple[str, ...] = (
+    "Oncology Clinic Progress Note\nPatient: ",
+    "\nDate: ",
+    "\n\nOncologic History:\n  ",
+    "\n\nTherapy History:\n",
+    "\n\nInterval History:\n"
+    "  Reports expected toxicities; eating and drinking adequately. No emergent issues.\n"
+    "\nCurrent Treatment:\n"
+    "  Line: ",
+    "L\n  Regimen: ",
+    "\n  Status: ",
+    "\n  ",
+    "\n  Supportive meds: ",
+    "\n\nAssessment:\n"
+    "  Solid malignancy with ongoing systemic therapy. Performance status ECOG 1.\n"
+    "  Imaging-based response as above.\n"
+    "\nPlan:\n"
+    "  ",
+    "\n  Continue labs and symptom management; return for next visit per protocol.\n",
+)
+
+def render_note_text(
+    patient_id: str,
+    encounter_date: datetime,
+    primary_site: str,
+    dx_date: datetime,
+    stage_at_dx: str,
+    lines: List[Dict],
+    current_line: int,
+    current_regimen: str,
+    current_cycle_day: Optional[Tuple[int,int]],
+    recist_summary: Optional[Dict],
+    rng: random.Random,
+) -> str:
+    enc = iso(encounter_date)
+    dx_iso = iso(dx_date)
+    syn_name = choose_regimen_synonym(current_regimen, rng)
+
+    history_lines = []
+    history_lines.append(f"Primary: {primary_site.capitalize()}, diagnosed {dx_iso}. Stage at dx: {stage_at_dx}.")
+    if recist_summary:
+        history_lines.append(
+            f"Most recent imaging {recist_summary['study_date']}: RECIST overall {recist_summary['overall_response']}, "
+            f"SLD baseline {recist_summary.get('baseline_sld_mm','')}, current {recist_summary.get('current_sld_mm','')}, "
+            f"nadir {recist_summary.get('nadir_sld_mm','')}."
+        )
+    history = " ".join(history_lines)
+
+    ther_hist = []
+    for ln in lines:
+        stop = f", stop {ln['stop_date']}" if ln.get("stop_date") else ""
+        ther_hist.append(
+            f"{ln['line']}L: {ln['regimen']} (start {ln['start_date']}{stop}); components: {', '.join(ln['components'])}."
+        )
+    therapy_history = "\n  - " + "\n  - ".join(ther_hist) if ther_hist else "  - none recorded"
+
+    cycle_str = ""
+    if current_cycle_day:
+        cycle_str = f"C{current_cycle_day[0]}D{current_cycle_day[1]}"
+    plan_line = f"Continue {syn_name} as tolerated." if not recist_summary or recist_summary.get("overall_response") in CONTINUE_RESPONSES else f"Plan to switch therapy pending progression review."
+
+    # sample() never repeats an element, so no set() is needed
+    supportive = ", ".join(sorted(rng.sample(SUPPORTIVE_MEDS, k=rng.randint(2, 4))))
+
+    p = _NOTE_PARTS
+    return "".join((
+        p[0], patient_id, p[1], enc, p[2], history, p[3], therapy_history,
+        p[4], str(current_line), p[5], syn_name,
+        p[6], "on-treatment" if current_cycle_day else "off-cycle",
+        p[7], ("Today is " + cycle_str) if cycle_str else "Not a treatment day today.",
+        p[8], supportive, p[9], plan_line, p[10],
+    ))
+
+# --------------------------- core generation ---------------------------
+
+def synth_patient_notes_for_existing(
+    patients_root: Path,
+    out_root: Path,
+    pid: str,
+    rng: random.Random,
+    notes_per_tp: int = 1,
+    ser: Callable[[Any], bytes] = dumps_line,
+    bundle: str = "none",
+) -> List[Dict]:
+    """Create notes aligned to imaging timepoints under the patient's folder."""
+    imaging = load_imaging_timeline(patients_root, pid)
+    if not imaging:
+        return []
+
+    # crude primary guess; otherwise pick common site
+    primary = detect_primary_from_patient_dir(patients_root / pid) or rng.choice(EXISTING_PRIMARIES)
+    stage = pick_stage(rng)
+    dx_date = _parse(imaging[0]["study_date"]) - timedelta(days=rng.randint(30, 240))
+
+    # Start with a 1L regimen around baseline
+    regimen_name = pick_regimen_for_primary(primary, rng)
+    regimen = REGIMENS[regimen_name]
+    start_c1d1 = _parse(imaging[0]["study_date"]) - timedelta(days=rng.randint(0, 14))
+    end_horizon = _parse(imaging[-1]["study_date"]) + timedelta(days=30)
+    cycles, date_index = schedule_cycles(regimen_name, start_c1d1, end_horizon)
+
+    line_date_indexes = [date_index]  # parallel to lines; kept out of the serialized line dicts
+    lines: List[Dict] = [{
+        "line": 1,
+        "regimen": regimen_name,
+        "components": regimen["components"],
+        "start_date": iso(start_c1d1),
+        "stop_date": None,
+        "cycles": cycles,
+    }]
+    current_line = 1
+
+    # If imaging shows PD at any timepoint, switch to next line starting soon after that date
+    plausible = PRIMARY_TO_PLAUSIBLE.get(primary, REGIMENS_KEYS)
+    for row in imaging[1:]:
+        if (row.get("recist") or {}).get("overall_response") == "PD":
+            # start 2L approximately 7-14 days after PD study date
+            switch_date = _parse(row["study_date"]) + timedelta(days=rng.randint(7, 14))
+            current_line += 1
+            # close prior line stop_date
+            if lines[-1]["stop_date"] is None:
+                lines[-1]["stop_date"] = iso(switch_date)
+            # choose a different regimen if possible
+            prev_regimen = lines[-1]["regimen"]
+            new_regimen_name = rng.choice(tuple(r for r in plausible if r != prev_regimen) or (prev_regimen,))
+            new_regimen = REGIMENS[new_regimen_name]
+            new_cycles, new_date_index = schedule_cycles(new_regimen_name, switch_date, end_horizon)
+            line_date_indexes.append(new_date_index)
+            lines.append({
+                "line": current_line,
+                "regimen": new_regimen_name,
+                "components": new_regimen["components"],
+                "start_date": iso(switch_date),
+                "stop_date": None,
+                "cycles": new_cycles,
+            })
+
+    notes_index: List[Dict] = []
+    # lines are final now: write them once per patient; each label points at them via lines_ref
+    pending_writes: List[Tuple[Path, bytes]] = [(out_root / "patients" / pid / "therapy.json", therapy_json(pid, lines, ser))]
+    prefix_recist = summarize_recist_timeline(imaging)
+    # each line stops the day the next one starts, so start dates alone locate the active line
+    start_ords = [_parse(ln["start_date"]).toordinal() for ln in lines]
+    for tp, row in enumerate(imaging):
+        study_date = _parse(row["study_date"])
+        recist_summary = prefix_recist[tp]
+        # pick which line is active on this date: on a switch day the outgoing line still counts,
+        # and dates before 1L start fall back to 1L
+        active_line_idx = max(bisect.bisect_left(start_ords, study_date.toordinal()) - 1, 0)
+        active = lines[active_line_idx]
+        # find if today is a treatment event (C?D?)
+        cday = find_current_cycle_day(line_date_indexes[active_line_idx], study_date)
+
+        for k in range(notes_per_tp):
+            # place note near study date
+            note_date = pick_note_date_near(study_date, rng)
+            # render text
+            text = render_note_text(
+                patient_id=pid,
+                encounter_date=note_date,
+                primary_site=primary,
+                dx_date=dx_date,
+                stage_at_dx=stage,
+                lines=lines,
+                current_line=active["line"],
+                current_regimen=active["regimen"],
+                current_cycle_day=cday if k == 0 else None,  # only first note of tp marked as treatment day
+                recist_summary=recist_summary,
+                rng=rng,
+            )
+            # structured label for easy IE training
+            label = {
+                "patient_id": pid,
+                "encounter_date": iso(note_date),
+                "primary_site": primary,
+                "stage_at_dx": stage,
+                "oncologic_history": {
+                    "diagnosis_date": iso(dx_date),
+                },
+                "lines_ref": THERAPY_REF,  # per-event CxDy schedule lives in therapy.json
+                "active_line": active["line"],
+                "active_regimen": active["regimen"],
+                "active_cycle_day": None if not cday else {"cycle": cday[0], "day": cday[1], "date": iso(study_date)},
+                "recist": recist_summary,
+            }
+
+            # buffer files; written per patient after the loop
+            note_dir = out_root / "patients" / pid / "notes" / iso(note_date)
+            pending_writes.append((note_dir / "note.txt", text.encode("utf-8")))
+            pending_writes.append((note_dir / "note.json", ser(label)))
+
+            notes_index.append({
+                "patient_id": pid,
+                "encounter_date": iso(note_date),
+                "line": active["line"],
+                "regimen": active["regimen"],
+                "is_treatment_day": bool(cday and k == 0),
+                "has_imaging_on_or_before": bool(recist_summary),
+                "overall_response": recist_summary.get("overall_response") if recist_summary else None,
+            })
+
+    write_patient_files(out_root / "patients" / pid, pending_writes, bundle)
+    return notes_index
+
+
+def synth_patient_notes_standalone(
+    out_root: Path,
+    pid: str,
+    rng: random.Random,
+    ser: Callable[[Any], bytes] = dumps_line,
+    bundle: str = "none",
+) -> List[Dict]:
+    """If no imaging exists, generate 3-5 notes and a simple 1L course."""
+    primary = rng.choice(STANDALONE_PRIMARIES)
+    stage = pick_stage(rng)
+    today = datetime(2024, rng.randint(1, 12), rng.randint(1, 28))
+    dx_date = today - timedelta(days=rng.randint(60, 300))
+    regimen_name = pick_regimen_for_primary(primary, rng)
+    start_c1d1 = today - timedelta(days=rng.randint(0, 21))
+    cycles, date_index = schedule_cycles(regimen_name, start_c1d1, today + timedelta(days=120))
+
+    lines = [{
+        "line": 1,
+        "regimen": regimen_name,
+        "components": REGIMENS[regimen_name]["components"],
+        "start_date": iso(start_c1d1),
+        "stop_date": None,
+        "cycles": cycles,
+    }]
+
+    notes_index: List[Dict] = []
+    pending_writes: List[Tuple[Path, bytes]] = [(out_root / "patients" / pid / "therapy.json", therapy_json(pid, lines, ser))]
+    n_notes = rng.randint(3, 5)
+    curr = today
+    for i in range(n_notes):
+        note_date = curr + timedelta(days=i * 21)
+        cday = find_current_cycle_day(date_index, note_date)
+        text = render_note_text(
+            patient_id=pid,
+            encounter_date=note_date,
+            primary_site=primary,
+            dx_date=dx_date,
+            stage_at_dx=stage,
+            lines=lines,
+            current_line=1,
+            current_regimen=regimen_name,
+            current_cycle_day=cday,
+            recist_summary=None,
+            rng=rng,
+        )
+        label = {
+            "patient_id": pid,
+            "encounter_date": iso(note_date),
+            "primary_site": primary,
+            "stage_at_dx": stage,
+            "oncologic_history": {"diagnosis_date": iso(dx_date)},
+            "lines_ref": THERAPY_REF,
+            "active_line": 1,
+            "active_regimen": regimen_name,
+            "active_cycle_day": None if not cday else {"cycle": cday[0], "day": cday[1], "date": iso(note_date)},
+            "recist": None,
+        }
+        note_dir = out_root / "patients" / pid / "notes" / iso(note_date)
+        pending_writes.append((note_dir / "note.txt", text.encode("utf-8")))
+        pending_writes.append((note_dir / "note.json", ser(label)))
+
+        notes_index.append({
+            "patient_id": pid,
+            "encounter_date": iso(note_date),
+            "line": 1,
+            "regimen": regimen_name,
+            "is_treatment_day": bool(cday),
+            "has_imaging_on_or_before": False,
+            "overall_response": None,
+        })
+    write_patient_files(out_root / "patients" / pid, pending_writes, bundle)
+    return notes_index
+
+# --------------------------- CLI ---------------------------
+
+def _notes_worker(pid: str, seed: int, patients_root: Optional[Path], out_root: Path, notes_per_tp: int,
+                  ser: Callable[[Any], bytes], bundle: str) -> List[Dict]:
+    """Generate one patient's notes in a worker process; seeded from (seed, pid) so output ignores scheduling."""
+    rng = random.Random(f"{seed}:{pid}")  # str seeds hash deterministically across processes
+    if patients_root is None:
+        return synth_patient_notes_standalone(out_root, pid, rng, ser=ser, bundle=bundle)
+    return synth_patient_notes_for_existing(patients_root, out_root, pid, rng,
+                                            notes_per_tp=notes_per_tp, ser=ser, bundle=bundle)
+
+def positive_int(s: str) -> int:
+    """argparse type for counts that must be at least 1 (e.g. --workers)."""
+    n = int(s)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {n}")
+    return n
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--patients_root", type=str, default="", help="Path to patients dir with imaging meta.json (e.g., data/synth_patients/patients)")
+    ap.add_argument("--out_dir", type=str, required=True, help="Root where notes will be written (usually same parent as patients_root)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--notes_per_tp", type=int, default=1, help="Notes per imaging timepoint (e.g., clinic + infusion)")
+    ap.add_argument("--workers", type=positive_int, default=os.cpu_count(), help="Processes used to generate patients")
+    fmt = ap.add_mutually_exclusive_group()
+    fmt.add_argument("--compact", dest="pretty", action="store_false",
+                     help="Single-line note.json/therapy.json (default)")
+    fmt.add_argument("--pretty", dest="pretty", action="store_true",
+                     help="Indented note.json/therapy.json for human inspection")
+    ap.set_defaults(pretty=False)
+    ap.add_argument("--bundle", choices=["none", "zip", "tar"], default="none",
+                    help="Pack each patient's notes/ and therapy.json into patients/<pid>/notes.{zip,tar}")
+    args = ap.parse_args()
+
+    out_root = Path(args.out_dir)
+    out_root.mkdir(parents=True, exist_ok=True)
+    notes_index_path = out_root / "notes_index.jsonl"
+
+    if args.patients_root:
+        patients_root = Path(args.patients_root)
+        with os.scandir(patients_root) as it:
+            pids = sorted(e.name for e in it if e.is_dir())
+    else:
+        # standalone mode: synthesize a few patients without imaging
+        patients_root = None
+        pids = [f"PID{i:06d}" for i in range(10)]
+
+    # patients are independent; map keeps results in PID order so the index is reproducible
+    worker = partial(_notes_worker, seed=args.seed, patients_root=patients_root,
+                     out_root=out_root, notes_per_tp=args.notes_per_tp,
+                     ser=dumps_pretty if args.pretty else dumps_line,  # chosen once, not per note
+                     bundle=args.bundle)
+    n_with_notes = 0
+    # stream each patient's rows into the 1 MiB buffer as they arrive instead of holding the cohort
+    with notes_index_path.open("wb", buffering=1 << 20) as idx, \
+            ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for rows in pool.map(worker, pids, chunksize=16):
+            if rows:  # one worker result per PID, so this counts distinct patients
+                n_with_notes += 1
+                idx.write(b"".join(dumps_line(r) + b"\n" for r in rows))
+
+    print(f"Generated notes for {n_with_notes} patients. Index at {notes_index_path}")
+
+if __name__ == "__main__":
+    main()
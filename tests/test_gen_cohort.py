@@ -0,0 +1,68 @@
+"""Output of tumor.synth.gen_cohort must not depend on --workers, --labels_only or --archive."""
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[1]
+
+
+def run_cohort(out_dir: Path, *extra: str) -> Path:
+    env = dict(os.environ, PYTHONPATH=str(REPO / "src"))
+    subprocess.run(
+        [sys.executable, "-m", "tumor.synth.gen_cohort",
+         "--out_dir", str(out_dir), "--n_patients", "12", "--seed", "7",
+         "--complexity_config", str(REPO / "configs" / "complexity.json"),
+         "--complexity_level", "4", "--include_negatives", *extra],
+        check=True, env=env, cwd=REPO, stdout=subprocess.DEVNULL,
+    )
+    return out_dir
+
+
+def tree_bytes(root: Path) -> dict:
+    return {p.relative_to(root).as_posix(): p.read_bytes() for p in sorted(root.rglob("*")) if p.is_file()}
+
+
+def index_without_text(path: Path) -> list:
+    rows = [json.loads(line) for line in path.read_bytes().splitlines()]
+    for row in rows:
+        row.pop("report_text")
+    return rows
+
+
+@pytest.fixture(scope="module")
+def plain(tmp_path_factory):
+    return run_cohort(tmp_path_factory.mktemp("plain"), "--workers", "1")
+
+
+def test_workers_do_not_change_output(plain, tmp_path):
+    parallel = run_cohort(tmp_path / "parallel", "--workers", "3")
+    assert tree_bytes(parallel) == tree_bytes(plain)
+
+
+def test_labels_only_matches_plain_labels(plain, tmp_path):
+    labels = run_cohort(tmp_path / "labels", "--labels_only", "--workers", "2")
+    expected = {k: v for k, v in tree_bytes(plain).items() if k.endswith("meta.json")}
+    got = tree_bytes(labels)
+    assert not any(k.endswith("report.txt") for k in got)
+    assert {k: v for k, v in got.items() if k.endswith("meta.json")} == expected
+    assert index_without_text(labels / "cohort_labels.jsonl") == index_without_text(plain / "cohort_labels.jsonl")
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar"])
+def test_archive_matches_plain(plain, tmp_path, kind):
+    out = run_cohort(tmp_path / kind, "--archive", kind, "--workers", "2")
+    if kind == "zip":
+        with zipfile.ZipFile(out / "cohort.zip") as zf:
+            members = {name: zf.read(name) for name in zf.namelist()}
+    else:
+        with tarfile.open(out / "cohort.tar") as tf:
+            members = {m.name: tf.extractfile(m).read() for m in tf.getmembers() if m.isfile()}
+    expected = tree_bytes(plain)
+    assert (out / "cohort_labels.jsonl").read_bytes() == expected.pop("cohort_labels.jsonl")
+    assert members == expected